@@ -8,55 +8,86 @@ Sie kann direkt bearbeitet werden oder über Umgebungsvariablen überschrieben w
 
 import os
 import socket
+import functools
 from pathlib import Path
 
 
 # Basis-Verzeichnis für die Anwendung
 BASE_DIR = Path(__file__).resolve().parent
 
+# Einmaliger Schnappschuss der Umgebungsvariablen, aus dem alle Werte gelesen werden
+_env = dict(os.environ)
+
+def _env_int(name, default):
+    """Liest eine Umgebungsvariable als int; fehlt sie, wird der Standardwert unverändert zurückgegeben."""
+    value = _env.get(name)
+    return default if value is None else int(value)
+
+def _env_float(name, default):
+    """Liest eine Umgebungsvariable als float; fehlt sie, wird der Standardwert unverändert zurückgegeben."""
+    value = _env.get(name)
+    return default if value is None else float(value)
+
 
 # Ollama API Konfiguration
-OLLAMA_API_HOST = os.environ.get("OLLAMA_API_HOST", "localhost")
-OLLAMA_API_PORT = int(os.environ.get("OLLAMA_API_PORT", 11434))
+OLLAMA_API_HOST = _env.get("OLLAMA_API_HOST", "localhost")
+OLLAMA_API_PORT = _env_int("OLLAMA_API_PORT", 11434)
 OLLAMA_API_URL = f"http://{OLLAMA_API_HOST}:{OLLAMA_API_PORT}"
 
 # Server-Konfiguration
-SERVER_HOST = os.environ.get("SERVER_HOST", "0.0.0.0")  # 0.0.0.0 = alle Interfaces
-SERVER_PORT = int(os.environ.get("SERVER_PORT", 5000))
-DEBUG_MODE = os.environ.get("DEBUG_MODE", "False").lower() == "true"
+SERVER_HOST = _env.get("SERVER_HOST", "0.0.0.0")  # 0.0.0.0 = alle Interfaces
+SERVER_PORT = _env_int("SERVER_PORT", 5000)
+DEBUG_MODE = _env.get("DEBUG_MODE", "False").lower() == "true"
 
 # Datenbank-Konfiguration
-DATABASE_PATH = os.environ.get("DATABASE_PATH", str(BASE_DIR / "data" / "chat_history.db"))
-# Sicherstellen, dass das Verzeichnis existiert
-Path(DATABASE_PATH).parent.mkdir(parents=True, exist_ok=True)
+DATABASE_PATH = _env.get("DATABASE_PATH", str(BASE_DIR / "data" / "chat_history.db"))
+# Sicherstellen, dass das Verzeichnis existiert (mkdir nur bei Neuinstallation)
+if not os.path.isdir(Path(DATABASE_PATH).parent):
+    Path(DATABASE_PATH).parent.mkdir(parents=True, exist_ok=True)
+DB_POOL_SIZE = _env_int("DB_POOL_SIZE", 8)  # Max. wiederverwendete Verbindungen
 
 # Modell-Konfiguration
-DEFAULT_MODEL = os.environ.get("DEFAULT_MODEL", "llama3")
-MODEL_PARAMS = {
-    "llama3": {
-        "temperature": float(os.environ.get("LLAMA3_TEMPERATURE", 0.7)),
-        "max_tokens": int(os.environ.get("LLAMA3_MAX_TOKENS", 2048)),
-        "top_p": float(os.environ.get("LLAMA3_TOP_P", 0.9)),
-        "repeat_penalty": float(os.environ.get("LLAMA3_REPEAT_PENALTY", 1.1))
-    },
-    "mistral": {
-        "temperature": float(os.environ.get("MISTRAL_TEMPERATURE", 0.72)),
-        "max_tokens": int(os.environ.get("MISTRAL_MAX_TOKENS", 2048)),
-        "top_p": float(os.environ.get("MISTRAL_TOP_P", 0.9)),
-        "repeat_penalty": float(os.environ.get("MISTRAL_REPEAT_PENALTY", 1.1))
-    },
-    "gemma": {
-        "temperature": float(os.environ.get("GEMMA_TEMPERATURE", 0.7)),
-        "max_tokens": int(os.environ.get("GEMMA_MAX_TOKENS", 2048)),
-        "top_p": float(os.environ.get("GEMMA_TOP_P", 0.9)),
-        "repeat_penalty": float(os.environ.get("GEMMA_REPEAT_PENALTY", 1.05))
-    }
+DEFAULT_MODEL = _env.get("DEFAULT_MODEL", "llama3")
+
+# Standard-Generierungsparameter je Modell. Jeder Wert kann über eine
+# Umgebungsvariable <MODELL>_<PARAMETER> überschrieben werden (z. B. LLAMA3_TEMPERATURE).
+MODEL_DEFAULTS = {
+    "llama3": {"temperature": 0.7, "max_tokens": 2048, "top_p": 0.9, "repeat_penalty": 1.1},
+    "mistral": {"temperature": 0.72, "max_tokens": 2048, "top_p": 0.9, "repeat_penalty": 1.1},
+    "gemma": {"temperature": 0.7, "max_tokens": 2048, "top_p": 0.9, "repeat_penalty": 1.05}
 }
 
+@functools.lru_cache(maxsize=64)
+def model_params(name):
+    """
+    Liefert die Generierungsparameter für ein Modell.
+    
+    Die Umgebungsvariablen werden erst beim ersten Zugriff ausgewertet und das
+    Ergebnis pro Modell zwischengespeichert. Unbekannte Modelle erhalten die
+    Parameter des Standardmodells.
+    
+    Args:
+        name (str): Name des Modells
+        
+    Returns:
+        dict: Parameter (temperature, max_tokens, top_p, repeat_penalty) oder leeres Dict
+    """
+    defaults = MODEL_DEFAULTS.get(name)
+    if defaults is None:
+        return model_params(DEFAULT_MODEL) if name != DEFAULT_MODEL else {}
+    
+    prefix = name.upper()
+    params = {}
+    for key, default in defaults.items():
+        parse = _env_int if isinstance(default, int) else _env_float
+        params[key] = parse(f"{prefix}_{key.upper()}", default)
+    return params
+
 # QR-Code-Konfiguration
-QRCODE_ERROR_CORRECTION = os.environ.get("QRCODE_ERROR_CORRECTION", "H")  # H = höchste Fehlerkorrektur
-QRCODE_BOX_SIZE = int(os.environ.get("QRCODE_BOX_SIZE", 10))
-QRCODE_BORDER = int(os.environ.get("QRCODE_BORDER", 4))
+QRCODE_ERROR_CORRECTION = _env.get("QRCODE_ERROR_CORRECTION", "H")  # H = höchste Fehlerkorrektur
+QRCODE_BOX_SIZE = _env_int("QRCODE_BOX_SIZE", 10)
+QRCODE_BORDER = _env_int("QRCODE_BORDER", 4)
+USE_SEGNO = _env.get("USE_SEGNO", "False").lower() == "true"  # segno statt qrcode als Encoder
 
 # Funktion zum Ermitteln der lokalen IP-Adresse
 def get_local_ip():
@@ -72,13 +103,19 @@ def get_local_ip():
         # Fallback auf localhost
         return "127.0.0.1"
 
-# Lokale IP-Adresse für QR-Code
-LOCAL_IP = os.environ.get("LOCAL_IP", get_local_ip())
+@functools.lru_cache(maxsize=1)
+def get_local_ip_cached():
+    """
+    Liefert die lokale IP-Adresse für QR-Codes (Umgebungsvariable LOCAL_IP oder ermittelt).
+    
+    Die Ermittlung erfolgt erst beim ersten Aufruf statt beim Import.
+    """
+    return _env.get("LOCAL_IP") or get_local_ip()
 
 # Logging-Konfiguration
-LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
-LOG_FORMAT = os.environ.get("LOG_FORMAT", "%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-LOG_FILE = os.environ.get("LOG_FILE", "")  # Leer = nur Konsole
+LOG_LEVEL = _env.get("LOG_LEVEL", "INFO")
+LOG_FORMAT = _env.get("LOG_FORMAT", "%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+LOG_FILE = _env.get("LOG_FILE", "")  # Leer = nur Konsole
 
 # Cache-Einstellungen
-MODELS_CACHE_TIME = int(os.environ.get("MODELS_CACHE_TIME", 300))  # Sekunden
\ No newline at end of file
+MODELS_CACHE_TIME = _env_int("MODELS_CACHE_TIME", 300)  # Sekunden
\ No newline at end of file
@@ -11,15 +11,33 @@ import uuid
 import datetime
 import logging
 import json
-import os
-from pathlib import Path
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
 
 # Konfiguration importieren
-from config import DATABASE_PATH
+from config import DATABASE_PATH, DB_POOL_SIZE
 
 # Logger einrichten
 logger = logging.getLogger("OllamaDB")
 
+# Pool wiederverwendbarer Verbindungen (LIFO, damit "warme" Verbindungen bevorzugt werden)
+_pool = queue.LifoQueue(maxsize=DB_POOL_SIZE)
+
+# Warteschlange für Schreiboperationen; sie werden von einem einzigen
+# Writer-Thread über eine eigene Verbindung ausgeführt
+_writer_q = queue.Queue()
+_writer_thread = None
+_writer_lock = threading.Lock()
+
+# Group Commit: max. Operationen pro Transaktion und optionales Sammelfenster in
+# Sekunden. Standardmäßig (0) wird nicht gewartet, sondern nur zusammengefasst,
+# was bereits in der Warteschlange liegt.
+GROUP_COMMIT_MAX_OPS = 32
+GROUP_COMMIT_WINDOW = 0.0
+
 # SQL-Anweisungen für die Tabellenerstellung
 CREATE_TABLES_SQL = [
     """
@@ -49,51 +67,98 @@ CREATE_TABLES_SQL = [
         last_connected TEXT NOT NULL,
         is_default INTEGER DEFAULT 0
     )
+    """,
+    # Indizes für die häufigsten Abfragen (vermeiden Full-Table-Scans und Sortierung)
+    """
+    CREATE INDEX IF NOT EXISTS idx_messages_chat_ts ON messages (chat_id, timestamp)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_chats_updated ON chats (updated_at DESC)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_servers_default ON servers (is_default) WHERE is_default = 1
     """
 ]
 
+# Häufig ausgeführte Anweisungen als Konstanten, damit der Statement-Cache
+# der gepoolten Verbindungen sie ohne erneutes Parsen wiederverwendet
+_SQL_INSERT_MSG = (
+    "INSERT INTO messages (id, chat_id, role, content, timestamp) VALUES (?, ?, ?, ?, ?)"
+)
+_SQL_UPDATE_CHAT_TS = "UPDATE chats SET updated_at = ? WHERE id = ?"
+_SQL_SELECT_HISTORY = (
+    "SELECT role, content FROM messages "
+    "WHERE chat_id = ? ORDER BY timestamp"
+)
+_SQL_SELECT_MSGS = (
+    "SELECT id, chat_id, role, content, timestamp FROM messages "
+    "WHERE chat_id = ? ORDER BY timestamp"
+)
+_SQL_SELECT_CHAT_WITH_MSGS = (
+    "SELECT c.id, c.title, c.model, c.created_at, c.updated_at, "
+    "m.id, m.role, m.content, m.timestamp "
+    "FROM chats c LEFT JOIN messages m ON m.chat_id = c.id "
+    "WHERE c.id = ? ORDER BY m.timestamp"
+)
+
+# Größe des Statement-Caches pro Verbindung
+STATEMENT_CACHE_SIZE = 256
+
+# PRAGMAs, die für jede Verbindung gesetzt werden (WAL-Modus, weniger fsyncs)
+CONNECTION_PRAGMAS = [
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -10000",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA journal_size_limit = 67108864"
+]
+
+# Alle PRAGMAs als ein Skript, damit sie mit einem einzigen Aufruf gesetzt werden.
+# Für In-Memory-Datenbanken wird WAL übersprungen.
+_CONNECTION_SCRIPT = "".join(f"{pragma};\n" for pragma in CONNECTION_PRAGMAS)
+if DATABASE_PATH != ":memory:":
+    _CONNECTION_SCRIPT = "PRAGMA journal_mode = WAL;\n" + _CONNECTION_SCRIPT
+
+def configure_connection(conn):
+    """
+    Setzt Journal-Modus und PRAGMAs für eine neue Datenbankverbindung.
+    
+    WAL erlaubt gleichzeitiges Lesen und Schreiben und spart zusammen mit
+    synchronous=NORMAL einen fsync pro Commit.
+    """
+    conn.executescript(_CONNECTION_SCRIPT)
+
 def init_db():
     """
     Initialisiert die Datenbank und erstellt die notwendigen Tabellen,
     falls sie noch nicht existieren.
     """
-    # Verzeichnis erstellen, falls es nicht existiert
-    os.makedirs(Path(DATABASE_PATH).parent, exist_ok=True)
-    
-    conn = None
     try:
-        # Verbindung herstellen
-        conn = sqlite3.connect(DATABASE_PATH)
-        # Fremdschlüssel aktivieren
-        conn.execute("PRAGMA foreign_keys = ON")
-        
-        cursor = conn.cursor()
-        
-        # Tabellen erstellen
-        for create_sql in CREATE_TABLES_SQL:
-            cursor.execute(create_sql)
+        with borrow_conn() as conn:
+            cursor = conn.cursor()
             
-        # Standardserver hinzufügen, falls noch keiner existiert
-        cursor.execute("SELECT COUNT(*) FROM servers WHERE is_default = 1")
-        if cursor.fetchone()[0] == 0:
-            add_default_server(conn)
-            
-        conn.commit()
+            # Tabellen erstellen
+            for create_sql in CREATE_TABLES_SQL:
+                cursor.execute(create_sql)
+                
+            # Standardserver hinzufügen, falls noch keiner existiert
+            cursor.execute("SELECT COUNT(*) FROM servers WHERE is_default = 1")
+            if cursor.fetchone()[0] == 0:
+                add_default_server(conn)
+                
+            conn.commit()
         logger.info(f"Datenbank initialisiert: {DATABASE_PATH}")
     except sqlite3.Error as e:
         logger.error(f"Datenbankfehler bei der Initialisierung: {e}")
-        if conn:
-            conn.rollback()
         raise
-    finally:
-        if conn:
-            conn.close()
 
 def add_default_server(conn):
     """Fügt den lokalen Ollama-Server als Standard-Server hinzu."""
     from config import OLLAMA_API_URL
     
-    server_id = str(uuid.uuid4())
+    server_id = uuid.uuid4().hex
     now = datetime.datetime.now().isoformat()
     
     cursor = conn.cursor()
@@ -103,12 +168,199 @@ def add_default_server(conn):
     )
 
 def get_db_connection():
-    """Erstellt und gibt eine Datenbankverbindung zurück."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.execute("PRAGMA foreign_keys = ON")
-    conn.row_factory = sqlite3.Row  # Ergebnisse als Dict
+    """Erstellt und gibt eine neue, konfigurierte Datenbankverbindung zurück."""
+    conn = sqlite3.connect(
+        DATABASE_PATH,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE
+    )
+    configure_connection(conn)
     return conn
 
+def _row_to_dict(cursor, row):
+    """Wandelt eine Ergebniszeile anhand der Spaltennamen des Cursors in ein Dict um."""
+    columns = [column[0] for column in cursor.description]
+    return dict(zip(columns, row))
+
+def _fetch_dicts(cursor, batch_size=256):
+    """
+    Liest alle Ergebniszeilen eines Cursors als Liste von Dicts.
+    
+    Die Spaltennamen werden einmal pro Abfrage ermittelt, die Zeilen
+    blockweise über fetchmany() gelesen.
+    """
+    columns = [column[0] for column in cursor.description]
+    result = []
+    rows = cursor.fetchmany(batch_size)
+    while rows:
+        result.extend(dict(zip(columns, row)) for row in rows)
+        rows = cursor.fetchmany(batch_size)
+    return result
+
+def _release_conn(conn):
+    """Gibt eine Verbindung an den Pool zurück oder schließt sie, wenn der Pool voll ist."""
+    try:
+        _pool.put_nowait(conn)
+    except queue.Full:
+        conn.close()
+
+@contextmanager
+def borrow_conn(row_factory=None):
+    """
+    Leiht eine Verbindung aus dem Pool aus und gibt sie danach zurück.
+    
+    Ist der Pool leer, wird eine neue Verbindung erstellt. Offene
+    Transaktionen werden vor der Rückgabe zurückgerollt; nach einem
+    sqlite3.Error wird die Verbindung verworfen statt wiederverwendet.
+    
+    Args:
+        row_factory (callable, optional): Row-Factory für diese Ausleihe,
+                                          z. B. sqlite3.Row. Standard sind Tupel.
+    
+    Yields:
+        sqlite3.Connection: Die ausgeliehene Verbindung
+    """
+    try:
+        conn = _pool.get_nowait()
+    except queue.Empty:
+        conn = get_db_connection()
+    conn.row_factory = row_factory
+    
+    try:
+        yield conn
+    except sqlite3.Error:
+        conn.close()
+        raise
+    except BaseException:
+        conn.rollback()
+        _release_conn(conn)
+        raise
+    else:
+        if conn.in_transaction:
+            conn.rollback()
+        _release_conn(conn)
+
+def _next_write_batch():
+    """
+    Wartet auf die nächste Schreiboperation und sammelt weitere für einen Group Commit.
+    
+    Nach der ersten Operation werden alle bereits wartenden Operationen
+    (höchstens GROUP_COMMIT_MAX_OPS) übernommen, ohne auf weitere zu warten.
+    Nur wenn GROUP_COMMIT_WINDOW > 0 ist, wird so lange auf weitere gewartet.
+    
+    Returns:
+        list: Liste von (statements, future, result)-Tupeln
+    """
+    batch = [_writer_q.get()]
+    
+    if GROUP_COMMIT_WINDOW <= 0:
+        # Nur bereits wartende Operationen übernehmen
+        while len(batch) < GROUP_COMMIT_MAX_OPS:
+            try:
+                batch.append(_writer_q.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    deadline = time.monotonic() + GROUP_COMMIT_WINDOW
+    while len(batch) < GROUP_COMMIT_MAX_OPS:
+        timeout = deadline - time.monotonic()
+        try:
+            if timeout > 0:
+                batch.append(_writer_q.get(timeout=timeout))
+            else:
+                batch.append(_writer_q.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+def _writer_loop():
+    """
+    Arbeitet die Schreib-Warteschlange ab.
+    
+    Mehrere Operationen werden gemeinsam in einer Transaktion
+    (BEGIN IMMEDIATE ... COMMIT) geschrieben, sodass nur ein fsync anfällt.
+    Jede Operation läuft in einem eigenen Savepoint: schlägt sie fehl, wird
+    nur sie zurückgerollt. Ergebnis oder Fehler werden über das Future an
+    den Aufrufer gemeldet, erfolgreiche Operationen erst nach dem Commit.
+    Die Schleife endet nie; nach einem Fehler wird die Verbindung neu geöffnet.
+    """
+    conn = None
+    while True:
+        batch = [op for op in _next_write_batch() if op[1].set_running_or_notify_cancel()]
+        if not batch:
+            continue
+        
+        committed = []
+        try:
+            if conn is None:
+                conn = get_db_connection()
+                conn.isolation_level = None  # Transaktionen explizit steuern
+            conn.execute("BEGIN IMMEDIATE")
+            for statements, future, result in batch:
+                conn.execute("SAVEPOINT write_op")
+                try:
+                    for sql, params in statements:
+                        conn.execute(sql, params)
+                except Exception as e:
+                    # Auch Nicht-SQLite-Fehler (z. B. OverflowError beim Binden)
+                    # betreffen nur diese Operation
+                    conn.execute("ROLLBACK TO write_op")
+                    future.set_exception(e)
+                else:
+                    committed.append((future, result))
+                conn.execute("RELEASE write_op")
+            conn.execute("COMMIT")
+        except Exception as e:
+            logger.error(f"Fehler beim gemeinsamen Schreiben: {e}")
+            # Verbindung nach einem Fehler verwerfen, wie in borrow_conn
+            if conn is not None:
+                try:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                except Exception as rollback_error:
+                    logger.error(f"Fehler beim Zurückrollen: {rollback_error}")
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                conn = None
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for future, result in committed:
+                future.set_result(result)
+
+def _submit_write(statements, result=None):
+    """
+    Übergibt Schreibanweisungen an den Writer-Thread.
+    
+    Args:
+        statements (list): Liste von (sql, params)-Paaren, die gemeinsam
+                           in einer Transaktion ausgeführt werden
+        result (Any, optional): Wert, mit dem das Future nach dem Commit erfüllt wird
+        
+    Returns:
+        Future: Wird nach dem Commit mit result erfüllt oder enthält den Fehler
+    """
+    global _writer_thread
+    if _writer_thread is None:
+        with _writer_lock:
+            if _writer_thread is None:
+                _writer_thread = threading.Thread(
+                    target=_writer_loop, name="OllamaDBWriter", daemon=True
+                )
+                _writer_thread.start()
+    
+    future = Future()
+    _writer_q.put((statements, future, result))
+    return future
+
+def _execute_write(statements, result=None):
+    """Führt Schreibanweisungen über den Writer-Thread aus und wartet auf den Commit."""
+    return _submit_write(statements, result).result()
+
 def create_chat(title, model):
     """
     Erstellt einen neuen Chat in der Datenbank.
@@ -120,49 +372,28 @@ def create_chat(title, model):
     Returns:
         str: ID des erstellten Chats
     """
-    chat_id = str(uuid.uuid4())
+    chat_id = uuid.uuid4().hex
     now = datetime.datetime.now().isoformat()
     
-    conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(
+        _execute_write([(
             "INSERT INTO chats (id, title, model, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
             (chat_id, title, model, now, now)
-        )
-        conn.commit()
+        )])
         logger.info(f"Neuer Chat erstellt: {chat_id} mit Modell {model}")
         return chat_id
     except sqlite3.Error as e:
         logger.error(f"Fehler beim Erstellen des Chats: {e}")
-        if conn:
-            conn.rollback()
         raise
-    finally:
-        if conn:
-            conn.close()
 
 def update_chat_timestamp(chat_id):
     """Aktualisiert den Zeitstempel eines Chats."""
     now = datetime.datetime.now().isoformat()
     
-    conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE chats SET updated_at = ? WHERE id = ?",
-            (now, chat_id)
-        )
-        conn.commit()
+        _execute_write([(_SQL_UPDATE_CHAT_TS, (now, chat_id))])
     except sqlite3.Error as e:
         logger.error(f"Fehler beim Aktualisieren des Chat-Zeitstempels: {e}")
-        if conn:
-            conn.rollback()
-    finally:
-        if conn:
-            conn.close()
 
 def add_message(chat_id, role, content):
     """
@@ -176,31 +407,50 @@ def add_message(chat_id, role, content):
     Returns:
         str: ID der erstellten Nachricht
     """
-    message_id = str(uuid.uuid4())
+    message_id = uuid.uuid4().hex
     now = datetime.datetime.now().isoformat()
     
-    conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO messages (id, chat_id, role, content, timestamp) VALUES (?, ?, ?, ?, ?)",
-            (message_id, chat_id, role, content, now)
-        )
-        conn.commit()
-        
-        # Chat-Zeitstempel aktualisieren
-        update_chat_timestamp(chat_id)
-        
-        return message_id
+        # Nachricht und Chat-Zeitstempel in derselben Transaktion schreiben
+        return _execute_write([
+            (_SQL_INSERT_MSG, (message_id, chat_id, role, content, now)),
+            (_SQL_UPDATE_CHAT_TS, (now, chat_id))
+        ], result=message_id)
     except sqlite3.Error as e:
         logger.error(f"Fehler beim Hinzufügen der Nachricht: {e}")
-        if conn:
-            conn.rollback()
         raise
-    finally:
-        if conn:
-            conn.close()
+
+def add_messages(chat_id, items):
+    """
+    Fügt mehrere Nachrichten in einer einzigen Transaktion zu einem Chat hinzu.
+    
+    Die Zeitstempel steigen innerhalb des Aufrufs streng an, damit die
+    Reihenfolge der Nachrichten beim Lesen erhalten bleibt.
+    
+    Args:
+        chat_id (str): ID des Chats
+        items (list): Liste von (role, content)-Tupeln
+        
+    Returns:
+        list: IDs der erstellten Nachrichten in derselben Reihenfolge
+    """
+    if not items:
+        return []
+    
+    message_ids = [uuid.uuid4().hex for _ in items]
+    base = datetime.datetime.now()
+    
+    statements = []
+    for i, (message_id, (role, content)) in enumerate(zip(message_ids, items)):
+        now = (base + datetime.timedelta(microseconds=i)).isoformat()
+        statements.append((_SQL_INSERT_MSG, (message_id, chat_id, role, content, now)))
+    statements.append((_SQL_UPDATE_CHAT_TS, (now, chat_id)))
+    
+    try:
+        return _execute_write(statements, result=message_ids)
+    except sqlite3.Error as e:
+        logger.error(f"Fehler beim Hinzufügen der Nachrichten: {e}")
+        raise
 
 def get_chat(chat_id):
     """
@@ -212,36 +462,46 @@ def get_chat(chat_id):
     Returns:
         dict: Chat mit Nachrichten oder None, wenn nicht gefunden
     """
-    conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Chat-Informationen abrufen
-        cursor.execute("SELECT * FROM chats WHERE id = ?", (chat_id,))
-        chat = cursor.fetchone()
-        
-        if not chat:
-            return None
-        
-        # Nachrichten abrufen
-        cursor.execute(
-            "SELECT * FROM messages WHERE chat_id = ? ORDER BY timestamp",
-            (chat_id,)
-        )
-        messages = [dict(message) for message in cursor.fetchall()]
+        with borrow_conn() as conn:
+            # Chat und Nachrichten in einer Abfrage lesen
+            cursor = conn.execute(_SQL_SELECT_CHAT_WITH_MSGS, (chat_id,))
+            rows = cursor.fetchmany(256)
+            
+            if not rows:
+                return None
+            
+            # Kopfdaten aus der ersten Zeile, Nachrichten aus allen Zeilen
+            id_, title, model, created_at, updated_at = rows[0][:5]
+            chat_dict = {
+                "id": id_,
+                "title": title,
+                "model": model,
+                "created_at": created_at,
+                "updated_at": updated_at
+            }
+            messages = []
+            while rows:
+                messages.extend(
+                    {
+                        "id": message_id,
+                        "chat_id": id_,
+                        "role": role,
+                        "content": content,
+                        "timestamp": timestamp
+                    }
+                    for message_id, role, content, timestamp in (row[5:] for row in rows)
+                    if message_id is not None
+                )
+                rows = cursor.fetchmany(256)
         
         # Chat als Dict zurückgeben
-        chat_dict = dict(chat)
         chat_dict['messages'] = messages
         
         return chat_dict
     except sqlite3.Error as e:
         logger.error(f"Fehler beim Abrufen des Chats: {e}")
         return None
-    finally:
-        if conn:
-            conn.close()
 
 def get_chat_messages(chat_id):
     """
@@ -253,22 +513,35 @@ def get_chat_messages(chat_id):
     Returns:
         list: Liste der Nachrichten oder leere Liste, wenn keine gefunden
     """
-    conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT * FROM messages WHERE chat_id = ? ORDER BY timestamp",
-            (chat_id,)
-        )
-        messages = [dict(message) for message in cursor.fetchall()]
+        with borrow_conn() as conn:
+            cursor = conn.execute(_SQL_SELECT_MSGS, (chat_id,))
+            messages = _fetch_dicts(cursor)
         return messages
     except sqlite3.Error as e:
         logger.error(f"Fehler beim Abrufen der Nachrichten: {e}")
         return []
-    finally:
-        if conn:
-            conn.close()
+
+def get_chat_history(chat_id):
+    """
+    Ruft den Verlauf eines Chats im Format der Ollama-API ab.
+    
+    Es werden nur Rolle und Inhalt gelesen, die Nachrichten kommen direkt als
+    {"role": ..., "content": ...} zurück.
+    
+    Args:
+        chat_id (str): ID des Chats
+        
+    Returns:
+        list: Liste der Nachrichten oder leere Liste, wenn keine gefunden
+    """
+    try:
+        with borrow_conn() as conn:
+            rows = conn.execute(_SQL_SELECT_HISTORY, (chat_id,)).fetchall()
+        return [{"role": role, "content": content} for role, content in rows]
+    except sqlite3.Error as e:
+        logger.error(f"Fehler beim Abrufen des Chat-Verlaufs: {e}")
+        return []
 
 def get_all_chats():
     """
@@ -277,21 +550,16 @@ def get_all_chats():
     Returns:
         list: Liste aller Chats (ohne Nachrichten)
     """
-    conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT * FROM chats ORDER BY updated_at DESC"
-        )
-        chats = [dict(chat) for chat in cursor.fetchall()]
+        with borrow_conn() as conn:
+            cursor = conn.execute(
+                "SELECT * FROM chats ORDER BY updated_at DESC"
+            )
+            chats = _fetch_dicts(cursor)
         return chats
     except sqlite3.Error as e:
         logger.error(f"Fehler beim Abrufen aller Chats: {e}")
         return []
-    finally:
-        if conn:
-            conn.close()
 
 def delete_chat(chat_id):
     """
@@ -303,23 +571,14 @@ def delete_chat(chat_id):
     Returns:
         bool: True, wenn erfolgreich, False bei Fehler
     """
-    conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM chats WHERE id = ?", (chat_id,))
         # Durch Foreign Key Constraint werden auch alle Nachrichten gelöscht
-        conn.commit()
+        _execute_write([("DELETE FROM chats WHERE id = ?", (chat_id,))])
         logger.info(f"Chat gelöscht: {chat_id}")
         return True
     except sqlite3.Error as e:
         logger.error(f"Fehler beim Löschen des Chats: {e}")
-        if conn:
-            conn.rollback()
         return False
-    finally:
-        if conn:
-            conn.close()
 
 def save_server(name, url, is_default=False):
     """
@@ -333,33 +592,26 @@ def save_server(name, url, is_default=False):
     Returns:
         str: ID des gespeicherten Servers
     """
-    server_id = str(uuid.uuid4())
+    server_id = uuid.uuid4().hex
     now = datetime.datetime.now().isoformat()
     
-    conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        statements = []
         
         # Wenn dieser Server der Standard sein soll, alle anderen zurücksetzen
         if is_default:
-            cursor.execute("UPDATE servers SET is_default = 0")
+            statements.append(("UPDATE servers SET is_default = 0", ()))
         
-        cursor.execute(
+        statements.append((
             "INSERT INTO servers (id, name, url, last_connected, is_default) VALUES (?, ?, ?, ?, ?)",
             (server_id, name, url, now, 1 if is_default else 0)
-        )
-        conn.commit()
+        ))
+        _execute_write(statements)
         logger.info(f"Server gespeichert: {name} ({url})")
         return server_id
     except sqlite3.Error as e:
         logger.error(f"Fehler beim Speichern des Servers: {e}")
-        if conn:
-            conn.rollback()
         raise
-    finally:
-        if conn:
-            conn.close()
 
 def get_default_server():
     """
@@ -368,19 +620,14 @@ def get_default_server():
     Returns:
         dict: Server-Informationen oder None, wenn kein Standard-Server gefunden
     """
-    conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM servers WHERE is_default = 1")
-        server = cursor.fetchone()
-        return dict(server) if server else None
+        with borrow_conn() as conn:
+            cursor = conn.execute("SELECT * FROM servers WHERE is_default = 1")
+            server = cursor.fetchone()
+            return _row_to_dict(cursor, server) if server else None
     except sqlite3.Error as e:
         logger.error(f"Fehler beim Abrufen des Standard-Servers: {e}")
         return None
-    finally:
-        if conn:
-            conn.close()
 
 def get_all_servers():
     """
@@ -389,37 +636,23 @@ def get_all_servers():
     Returns:
         list: Liste aller Server
     """
-    conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM servers ORDER BY last_connected DESC")
-        servers = [dict(server) for server in cursor.fetchall()]
+        with borrow_conn() as conn:
+            cursor = conn.execute("SELECT * FROM servers ORDER BY last_connected DESC")
+            servers = _fetch_dicts(cursor)
         return servers
     except sqlite3.Error as e:
         logger.error(f"Fehler beim Abrufen aller Server: {e}")
         return []
-    finally:
-        if conn:
-            conn.close()
 
 def update_server_connection(server_id):
     """Aktualisiert den Zeitstempel der letzten Verbindung eines Servers."""
     now = datetime.datetime.now().isoformat()
     
-    conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(
+        _execute_write([(
             "UPDATE servers SET last_connected = ? WHERE id = ?",
             (now, server_id)
-        )
-        conn.commit()
+        )])
     except sqlite3.Error as e:
-        logger.error(f"Fehler beim Aktualisieren des Server-Zeitstempels: {e}")
-        if conn:
-            conn.rollback()
-    finally:
-        if conn:
-            conn.close()
\ No newline at end of file
+        logger.error(f"Fehler beim Aktualisieren des Server-Zeitstempels: {e}")
\ No newline at end of file
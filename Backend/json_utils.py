@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+JSON-Hilfsfunktionen für das Ollama Chat Backend
+
+Dieses Modul kapselt die JSON-Serialisierung. Ist orjson installiert, wird es
+verwendet, ansonsten das json-Modul der Standardbibliothek.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson.JSONDecodeError ist eine Unterklasse von json.JSONDecodeError
+JSONDecodeError = json.JSONDecodeError
+
+def loads(data):
+    """
+    Parst ein JSON-Dokument.
+
+    Args:
+        data (str | bytes | bytearray | memoryview): Das JSON-Dokument
+
+    Returns:
+        Any: Das geparste Objekt
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+def dumps(obj) -> bytes:
+    """
+    Serialisiert ein Objekt als kompaktes, UTF-8-kodiertes JSON.
+
+    Args:
+        obj (Any): Das zu serialisierende Objekt
+
+    Returns:
+        bytes: Das JSON-Dokument
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Maskenbewertung für QR-Codes
+
+Dieses Modul enthält eine mit Numba kompilierte Fassung von
+qrcode.util.lost_point, die die Strafpunkte der vier QR-Maskenregeln berechnet.
+Ist numba nicht installiert, bleibt die Implementierung der Bibliothek aktiv.
+"""
+
+import logging
+
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:
+    np = None
+    njit = None
+
+# Logger einrichten
+logger = logging.getLogger("MaskScore")
+
+def _jit(func):
+    """Kompiliert eine Funktion mit Numba, falls verfügbar."""
+    if njit is None:
+        return func
+    return njit(cache=True)(func)
+
+@_jit
+def _finder_pattern_at(mat, row, col, dr, dc):
+    """
+    Prüft auf ein 1:1:3:1:1-Muster mit vier hellen Modulen davor oder danach.
+
+    Geprüft werden 11 Module ab (row, col) in Richtung (dr, dc):
+    10111010000 oder 00001011101.
+    """
+    if (mat[row + dr, col + dc]
+            or not mat[row + 4 * dr, col + 4 * dc]
+            or mat[row + 5 * dr, col + 5 * dc]
+            or not mat[row + 6 * dr, col + 6 * dc]
+            or mat[row + 9 * dr, col + 9 * dc]):
+        return False
+
+    if (mat[row, col]
+            and mat[row + 2 * dr, col + 2 * dc]
+            and mat[row + 3 * dr, col + 3 * dc]
+            and not mat[row + 7 * dr, col + 7 * dc]
+            and not mat[row + 8 * dr, col + 8 * dc]
+            and not mat[row + 10 * dr, col + 10 * dc]):
+        return True
+
+    return bool(not mat[row, col]
+                and not mat[row + 2 * dr, col + 2 * dc]
+                and not mat[row + 3 * dr, col + 3 * dc]
+                and mat[row + 7 * dr, col + 7 * dc]
+                and mat[row + 8 * dr, col + 8 * dc]
+                and mat[row + 10 * dr, col + 10 * dc])
+
+@_jit
+def score_mask(mat):
+    """
+    Berechnet die Strafpunkte einer QR-Matrix nach den vier Maskenregeln.
+
+    Die Schrittweiten entsprechen qrcode.util.lost_point, damit dieselbe Maske
+    gewählt wird wie von der Bibliothek.
+
+    Args:
+        mat (numpy.ndarray): Quadratische uint8-Matrix (1 = dunkles Modul)
+
+    Returns:
+        int: Summe der Strafpunkte
+    """
+    n = mat.shape[0]
+    points = 0
+
+    # Regel 1: Folgen von mindestens fünf gleichfarbigen Modulen (Zeilen)
+    for row in range(n):
+        previous = mat[row, 0]
+        length = 0
+        for col in range(n):
+            if mat[row, col] == previous:
+                length += 1
+            else:
+                if length >= 5:
+                    points += length - 2
+                length = 1
+                previous = mat[row, col]
+        if length >= 5:
+            points += length - 2
+
+    # Regel 1: Folgen von mindestens fünf gleichfarbigen Modulen (Spalten)
+    for col in range(n):
+        previous = mat[0, col]
+        length = 0
+        for row in range(n):
+            if mat[row, col] == previous:
+                length += 1
+            else:
+                if length >= 5:
+                    points += length - 2
+                length = 1
+                previous = mat[row, col]
+        if length >= 5:
+            points += length - 2
+
+    # Regel 2: Gleichfarbige 2x2-Blöcke
+    for row in range(n - 1):
+        col = 0
+        while col < n - 1:
+            top_right = mat[row, col + 1]
+            if top_right != mat[row + 1, col + 1]:
+                # Auch der nächste Block kann nicht gleichfarbig sein
+                col += 2
+                continue
+            if top_right == mat[row, col] and top_right == mat[row + 1, col]:
+                points += 3
+            col += 1
+
+    # Regel 3: Suchmuster-ähnliche Folgen in Zeilen und Spalten
+    for row in range(n):
+        col = 0
+        while col < n - 10:
+            if _finder_pattern_at(mat, row, col, 0, 1):
+                points += 40
+            col += 2 if mat[row, col + 10] else 1
+
+    for col in range(n):
+        row = 0
+        while row < n - 10:
+            if _finder_pattern_at(mat, row, col, 1, 0):
+                points += 40
+            row += 2 if mat[row + 10, col] else 1
+
+    # Regel 4: Abweichung des Dunkelanteils von 50 % (je 5 % zehn Punkte)
+    dark = 0
+    for row in range(n):
+        for col in range(n):
+            dark += mat[row, col]
+    percent = dark / (n * n)
+    points += int(abs(percent * 100 - 50) / 5) * 10
+
+    return points
+
+def lost_point(modules) -> int:
+    """
+    Ersatz für qrcode.util.lost_point auf Basis des kompilierten Kernels.
+
+    Args:
+        modules (List[List[bool]]): QR-Matrix der Bibliothek
+
+    Returns:
+        int: Summe der Strafpunkte
+    """
+    return int(score_mask(np.array(modules, dtype=np.uint8)))
+
+def install() -> bool:
+    """
+    Ersetzt qrcode.util.lost_point durch den kompilierten Kernel.
+
+    Der Kernel wird dabei einmal aufgerufen, damit die Kompilierung nicht in
+    die erste Anfrage fällt.
+
+    Returns:
+        bool: True, wenn der Kernel aktiv ist, sonst False (numba fehlt)
+    """
+    if njit is None:
+        return False
+
+    import qrcode.util
+
+    score_mask(np.zeros((21, 21), dtype=np.uint8))
+    qrcode.util.lost_point = lost_point
+    logger.debug("Numba-Maskenbewertung aktiviert")
+    return True
@@ -6,22 +6,104 @@ Dieses Modul stellt die Verbindung zur Ollama API her und bietet Funktionen
 zum Senden von Anfragen und Verarbeiten von Antworten.
 """
 
-import json
 import logging
 import time
+import functools
 import requests
-from typing import Dict, List, Any, Optional, Generator, Union, Tuple
+from requests.adapters import HTTPAdapter
+from typing import Dict, List, Any, Optional, Generator, AsyncGenerator, Union, Tuple
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+import json_utils
 
 # Konfiguration importieren
 from config import (
     OLLAMA_API_URL,
-    DEFAULT_MODEL,
-    MODEL_PARAMS
+    model_params
 )
 
 # Logger einrichten
 logger = logging.getLogger("OllamaClient")
 
+# Gültigkeit des zwischengespeicherten Verbindungsstatus in Sekunden
+CONNECTION_CHECK_TTL = 2.0
+
+# Header für vorab serialisierte JSON-Anfragen
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+@functools.lru_cache(maxsize=64)
+def _model_defaults(model: str) -> Tuple[float, int]:
+    """
+    Liefert die Standardwerte (temperature, max_tokens) für ein Modell.
+    
+    Das Ergebnis wird pro Modell zwischengespeichert, sodass eine Anfrage
+    nur noch einen einzigen Cache-Zugriff benötigt.
+    """
+    model_config = model_params(model)
+    return model_config.get("temperature", 0.7), model_config.get("max_tokens", 2048)
+
+def _generation_options(model: str,
+                        temperature: Optional[float],
+                        max_tokens: Optional[int]) -> Dict[str, Any]:
+    """Erstellt das options-Objekt einer Anfrage; fehlende Werte kommen aus der Modellkonfiguration."""
+    default_temperature, default_max_tokens = _model_defaults(model)
+    return {
+        "temperature": default_temperature if temperature is None else temperature,
+        "num_predict": default_max_tokens if max_tokens is None else max_tokens
+    }
+
+def _chat_request_body(model: str,
+                       message: str,
+                       history: Optional[List[Dict[str, str]]],
+                       temperature: Optional[float],
+                       max_tokens: Optional[int],
+                       stream: bool) -> Dict[str, Any]:
+    """Erstellt den Request-Body für /api/chat aus Verlauf und neuer Benutzernachricht."""
+    messages = []
+    if history:
+        messages.extend(history)
+    messages.append({"role": "user", "content": message})
+    
+    return {
+        "model": model,
+        "messages": messages,
+        "stream": stream,
+        "options": _generation_options(model, temperature, max_tokens)
+    }
+
+def _pop_ndjson_lines(buffer: bytearray) -> List[Dict[str, Any]]:
+    """
+    Parst alle vollständigen NDJSON-Zeilen im Puffer und entfernt sie daraus.
+    
+    Unvollständige Zeilen am Ende verbleiben im Puffer, bis weitere Daten eintreffen.
+    
+    Args:
+        buffer (bytearray): Puffer mit den bisher empfangenen Bytes
+        
+    Returns:
+        List[Dict[str, Any]]: Geparste Objekte bzw. Fehlermeldungen für ungültige Zeilen
+    """
+    chunks = []
+    start = 0
+    with memoryview(buffer) as view:
+        end = buffer.find(b"\n")
+        while end != -1:
+            line_end = end - 1 if end > start and buffer[end - 1] == 0x0D else end
+            if line_end > start:
+                try:
+                    chunks.append(json_utils.loads(view[start:line_end]))
+                except json_utils.JSONDecodeError as e:
+                    logger.error(f"Fehler beim Parsen der Stream-Antwort: {e}")
+                    chunks.append({"error": f"Fehler beim Parsen der Antwort: {str(e)}"})
+            start = end + 1
+            end = buffer.find(b"\n", start)
+    del buffer[:start]
+    return chunks
+
 class OllamaClient:
     """Client für die Kommunikation mit der Ollama API."""
     
@@ -34,8 +116,15 @@ class OllamaClient:
                                     Wenn nicht angegeben, wird die URL aus der Konfiguration verwendet.
         """
         self.api_url = api_url or OLLAMA_API_URL
-        self.models_cache = {"timestamp": 0, "data": None}
+        self.models_cache = {"timestamp": 0, "data": None, "etag": None}
         self.models_cache_time = 300  # Cache-Gültigkeit in Sekunden (5 Minuten)
+        self._conn_cache = (float("-inf"), False)  # (Zeitpunkt der Prüfung, Ergebnis)
+        
+        # Gemeinsame Session, damit Keep-Alive-Verbindungen wiederverwendet werden
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
         logger.info(f"Ollama-Client initialisiert mit API-URL: {self.api_url}")
     
     def _check_connection(self) -> bool:
@@ -45,12 +134,21 @@ class OllamaClient:
         Returns:
             bool: True bei erfolgreicher Verbindung, sonst False.
         """
+        # Ergebnis einer kurz zurückliegenden Prüfung wiederverwenden
+        checked_at, connected = self._conn_cache
+        now = time.monotonic()
+        if now - checked_at < CONNECTION_CHECK_TTL:
+            return connected
+        
         try:
-            response = requests.get(f"{self.api_url}/api/tags", timeout=5)
-            return response.status_code == 200
+            response = self._session.get(f"{self.api_url}/api/tags", timeout=5)
+            connected = response.status_code == 200
         except Exception as e:
             logger.error(f"Verbindungsfehler zur Ollama-API: {e}")
-            return False
+            connected = False
+        
+        self._conn_cache = (now, connected)
+        return connected
     
     def get_models(self, force_refresh: bool = False) -> Dict[str, Any]:
         """
@@ -71,13 +169,22 @@ class OllamaClient:
             logger.debug("Modelle aus Cache geladen")
             return self.models_cache["data"]
         
-        # Ansonsten neu laden
+        # Ansonsten neu laden (bei bekanntem ETag nur revalidieren)
+        headers = {}
+        if self.models_cache["etag"] and self.models_cache["data"] is not None:
+            headers["If-None-Match"] = self.models_cache["etag"]
+        
         try:
-            response = requests.get(f"{self.api_url}/api/tags", timeout=10)
-            if response.status_code == 200:
+            response = self._session.get(f"{self.api_url}/api/tags", headers=headers, timeout=10)
+            if response.status_code == 304 and self.models_cache["data"] is not None:
+                # Unverändert: nur den Cache-Zeitstempel erneuern
+                self.models_cache["timestamp"] = current_time
+                return self.models_cache["data"]
+            elif response.status_code == 200:
                 # Cache aktualisieren
                 self.models_cache["timestamp"] = current_time
                 self.models_cache["data"] = response.json()
+                self.models_cache["etag"] = response.headers.get("ETag")
                 return self.models_cache["data"]
             else:
                 error_msg = f"Fehler beim Abrufen der Modelle: {response.status_code}"
@@ -107,35 +214,16 @@ class OllamaClient:
         Returns:
             Dict[str, Any]: Die Antwort des Models oder eine Fehlermeldung
         """
-        # Standardwerte aus der Konfiguration laden, wenn nicht explizit angegeben
-        model_config = MODEL_PARAMS.get(model, MODEL_PARAMS.get(DEFAULT_MODEL, {}))
-        if temperature is None:
-            temperature = model_config.get("temperature", 0.7)
-        if max_tokens is None:
-            max_tokens = model_config.get("max_tokens", 2048)
-        
-        # Chat-Verlauf vorbereiten
-        messages = []
-        if history:
-            messages.extend(history)
-        messages.append({"role": "user", "content": message})
-        
-        # Anfrage erstellen
-        request_body = {
-            "model": model,
-            "messages": messages,
-            "stream": False,
-            "options": {
-                "temperature": temperature,
-                "num_predict": max_tokens
-            }
-        }
+        # Anfrage erstellen (Standardwerte aus der Konfiguration, wenn nicht explizit angegeben)
+        request_body = _chat_request_body(model, message, history, temperature, max_tokens,
+                                          stream=False)
         
         # Anfrage senden
         try:
-            response = requests.post(
+            response = self._session.post(
                 f"{self.api_url}/api/chat",
-                json=request_body,
+                data=json_utils.dumps(request_body),
+                headers=_JSON_HEADERS,
                 timeout=30
             )
             
@@ -172,35 +260,16 @@ class OllamaClient:
         Yields:
             Dict[str, Any]: Teile der Antwort als Stream
         """
-        # Standardwerte aus der Konfiguration laden, wenn nicht explizit angegeben
-        model_config = MODEL_PARAMS.get(model, MODEL_PARAMS.get(DEFAULT_MODEL, {}))
-        if temperature is None:
-            temperature = model_config.get("temperature", 0.7)
-        if max_tokens is None:
-            max_tokens = model_config.get("max_tokens", 2048)
-        
-        # Chat-Verlauf vorbereiten
-        messages = []
-        if history:
-            messages.extend(history)
-        messages.append({"role": "user", "content": message})
-        
-        # Anfrage erstellen
-        request_body = {
-            "model": model,
-            "messages": messages,
-            "stream": True,
-            "options": {
-                "temperature": temperature,
-                "num_predict": max_tokens
-            }
-        }
+        # Anfrage erstellen (Standardwerte aus der Konfiguration, wenn nicht explizit angegeben)
+        request_body = _chat_request_body(model, message, history, temperature, max_tokens,
+                                          stream=True)
         
         # Anfrage senden
         try:
-            with requests.post(
+            with self._session.post(
                 f"{self.api_url}/api/chat",
-                json=request_body,
+                data=json_utils.dumps(request_body),
+                headers=_JSON_HEADERS,
                 stream=True,
                 timeout=60
             ) as response:
@@ -210,15 +279,16 @@ class OllamaClient:
                     yield {"error": error_msg}
                     return
                 
-                # Antwort als Stream verarbeiten
-                for line in response.iter_lines():
-                    if line:
-                        try:
-                            chunk = json.loads(line)
-                            yield chunk
-                        except json.JSONDecodeError as e:
-                            logger.error(f"Fehler beim Parsen der Stream-Antwort: {e}")
-                            yield {"error": f"Fehler beim Parsen der Antwort: {str(e)}"}
+                # Antwort als Stream verarbeiten: Bytes puffern und zeilenweise parsen
+                buffer = bytearray()
+                for data in response.iter_content(chunk_size=None):
+                    buffer += data
+                    yield from _pop_ndjson_lines(buffer)
+                
+                # Letzte Zeile ohne abschließenden Zeilenumbruch
+                if buffer.strip():
+                    buffer += b"\n"
+                    yield from _pop_ndjson_lines(buffer)
                 
         except requests.RequestException as e:
             error_msg = f"Verbindungsfehler bei Stream-Anfrage: {str(e)}"
@@ -243,28 +313,22 @@ class OllamaClient:
             Dict[str, Any]: Die Antwort des Models oder eine Fehlermeldung
         """
         # Standardwerte aus der Konfiguration laden, wenn nicht explizit angegeben
-        model_config = MODEL_PARAMS.get(model, MODEL_PARAMS.get(DEFAULT_MODEL, {}))
-        if temperature is None:
-            temperature = model_config.get("temperature", 0.7)
-        if max_tokens is None:
-            max_tokens = model_config.get("max_tokens", 2048)
+        options = _generation_options(model, temperature, max_tokens)
         
         # Anfrage erstellen
         request_body = {
             "model": model,
             "prompt": prompt,
             "stream": False,
-            "options": {
-                "temperature": temperature,
-                "num_predict": max_tokens
-            }
+            "options": options
         }
         
         # Anfrage senden
         try:
-            response = requests.post(
+            response = self._session.post(
                 f"{self.api_url}/api/generate",
-                json=request_body,
+                data=json_utils.dumps(request_body),
+                headers=_JSON_HEADERS,
                 timeout=30
             )
             
@@ -299,9 +363,10 @@ class OllamaClient:
         
         # Anfrage senden
         try:
-            response = requests.post(
+            response = self._session.post(
                 f"{self.api_url}/api/embeddings",
-                json=request_body,
+                data=json_utils.dumps(request_body),
+                headers=_JSON_HEADERS,
                 timeout=10
             )
             
@@ -317,5 +382,244 @@ class OllamaClient:
             logger.error(error_msg)
             return {"error": error_msg}
 
+class AsyncOllamaClient:
+    """
+    Asynchroner Client für die Ollama API auf Basis von httpx.
+    
+    Erlaubt mehrere gleichzeitige (Stream-)Anfragen in einer Event-Loop.
+    Die Methoden entsprechen denen von OllamaClient, sind aber Koroutinen.
+    """
+    
+    def __init__(self, api_url: str = None, max_connections: int = 32):
+        """
+        Initialisiert den asynchronen Ollama-Client.
+        
+        Args:
+            api_url (str, optional): URL der Ollama-API.
+                                    Wenn nicht angegeben, wird die URL aus der Konfiguration verwendet.
+            max_connections (int, optional): Maximale Anzahl gleichzeitiger Verbindungen
+            
+        Raises:
+            ImportError: Wenn httpx nicht installiert ist
+        """
+        if httpx is None:
+            raise ImportError("Für AsyncOllamaClient wird das Paket 'httpx' benötigt (pip install httpx)")
+        
+        self.api_url = api_url or OLLAMA_API_URL
+        self.models_cache = {"timestamp": 0, "data": None}
+        self.models_cache_time = 300  # Cache-Gültigkeit in Sekunden (5 Minuten)
+        self._conn_cache = (float("-inf"), False)  # (Zeitpunkt der Prüfung, Ergebnis)
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections),
+            headers=_JSON_HEADERS
+        )
+        logger.info(f"Asynchroner Ollama-Client initialisiert mit API-URL: {self.api_url}")
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+    
+    async def aclose(self):
+        """Schließt alle offenen Verbindungen des Clients."""
+        await self._client.aclose()
+    
+    async def _check_connection(self) -> bool:
+        """
+        Überprüft die Verbindung zur Ollama-API.
+        
+        Returns:
+            bool: True bei erfolgreicher Verbindung, sonst False.
+        """
+        # Ergebnis einer kurz zurückliegenden Prüfung wiederverwenden
+        checked_at, connected = self._conn_cache
+        now = time.monotonic()
+        if now - checked_at < CONNECTION_CHECK_TTL:
+            return connected
+        
+        try:
+            response = await self._client.get(f"{self.api_url}/api/tags", timeout=5)
+            connected = response.status_code == 200
+        except Exception as e:
+            logger.error(f"Verbindungsfehler zur Ollama-API: {e}")
+            connected = False
+        
+        self._conn_cache = (now, connected)
+        return connected
+    
+    async def get_models(self, force_refresh: bool = False) -> Dict[str, Any]:
+        """
+        Ruft die verfügbaren Modelle von der Ollama-API ab.
+        
+        Args:
+            force_refresh (bool): Bei True wird der Cache ignoriert und neu geladen.
+            
+        Returns:
+            Dict[str, Any]: JSON-Antwort der API oder Fehlermeldung.
+        """
+        current_time = time.time()
+        
+        # Cache verwenden, wenn er noch gültig ist und kein Force-Refresh gewünscht ist
+        if (not force_refresh and 
+            self.models_cache["data"] is not None and 
+            current_time - self.models_cache["timestamp"] < self.models_cache_time):
+            return self.models_cache["data"]
+        
+        try:
+            response = await self._client.get(f"{self.api_url}/api/tags", timeout=10)
+            if response.status_code == 200:
+                self.models_cache["timestamp"] = current_time
+                self.models_cache["data"] = json_utils.loads(response.content)
+                return self.models_cache["data"]
+            else:
+                error_msg = f"Fehler beim Abrufen der Modelle: {response.status_code}"
+                logger.error(error_msg)
+                return {"error": error_msg}
+        except Exception as e:
+            error_msg = f"Verbindungsfehler bei Modellabfrage: {str(e)}"
+            logger.error(error_msg)
+            return {"error": error_msg}
+    
+    async def _post(self, path: str, request_body: Dict[str, Any], timeout: float,
+                    action: str) -> Dict[str, Any]:
+        """Sendet eine nicht-streamende POST-Anfrage und gibt die JSON-Antwort oder eine Fehlermeldung zurück."""
+        try:
+            response = await self._client.post(
+                f"{self.api_url}{path}",
+                content=json_utils.dumps(request_body),
+                timeout=timeout
+            )
+            
+            if response.status_code == 200:
+                return json_utils.loads(response.content)
+            else:
+                error_msg = f"Fehler bei der {action}: {response.status_code}"
+                logger.error(error_msg)
+                return {"error": error_msg}
+                
+        except Exception as e:
+            error_msg = f"Verbindungsfehler bei {action}: {str(e)}"
+            logger.error(error_msg)
+            return {"error": error_msg}
+    
+    async def chat(self, 
+                   model: str, 
+                   message: str, 
+                   history: List[Dict[str, str]] = None,
+                   temperature: float = None,
+                   max_tokens: int = None) -> Dict[str, Any]:
+        """
+        Sendet eine Chat-Anfrage an die Ollama-API und gibt die Antwort zurück.
+        
+        Args:
+            model (str): Name des zu verwendenden Modells
+            message (str): Die Nachricht des Benutzers
+            history (List[Dict[str, str]], optional): Bisheriger Chatverlauf
+            temperature (float, optional): Temperaturwert für die Generierung
+            max_tokens (int, optional): Maximale Anzahl an Tokens in der Antwort
+            
+        Returns:
+            Dict[str, Any]: Die Antwort des Models oder eine Fehlermeldung
+        """
+        request_body = _chat_request_body(model, message, history, temperature, max_tokens,
+                                          stream=False)
+        return await self._post("/api/chat", request_body, 30, "Chat-Anfrage")
+    
+    async def chat_stream(self, 
+                          model: str, 
+                          message: str, 
+                          history: List[Dict[str, str]] = None,
+                          temperature: float = None,
+                          max_tokens: int = None) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Sendet eine Chat-Anfrage und gibt die Antwort als asynchronen Stream zurück.
+        
+        Args:
+            model (str): Name des zu verwendenden Modells
+            message (str): Die Nachricht des Benutzers
+            history (List[Dict[str, str]], optional): Bisheriger Chatverlauf
+            temperature (float, optional): Temperaturwert für die Generierung
+            max_tokens (int, optional): Maximale Anzahl an Tokens in der Antwort
+            
+        Yields:
+            Dict[str, Any]: Teile der Antwort als Stream
+        """
+        request_body = _chat_request_body(model, message, history, temperature, max_tokens,
+                                          stream=True)
+        
+        try:
+            async with self._client.stream(
+                "POST",
+                f"{self.api_url}/api/chat",
+                content=json_utils.dumps(request_body),
+                timeout=60
+            ) as response:
+                if response.status_code != 200:
+                    error_msg = f"Fehler bei der Stream-Anfrage: {response.status_code}"
+                    logger.error(error_msg)
+                    yield {"error": error_msg}
+                    return
+                
+                # Antwort als Stream verarbeiten: Bytes puffern und zeilenweise parsen
+                buffer = bytearray()
+                async for data in response.aiter_bytes():
+                    buffer += data
+                    for chunk in _pop_ndjson_lines(buffer):
+                        yield chunk
+                
+                # Letzte Zeile ohne abschließenden Zeilenumbruch
+                if buffer.strip():
+                    buffer += b"\n"
+                    for chunk in _pop_ndjson_lines(buffer):
+                        yield chunk
+                
+        except httpx.HTTPError as e:
+            error_msg = f"Verbindungsfehler bei Stream-Anfrage: {str(e)}"
+            logger.error(error_msg)
+            yield {"error": error_msg}
+    
+    async def generate(self, 
+                       model: str, 
+                       prompt: str,
+                       temperature: float = None,
+                       max_tokens: int = None) -> Dict[str, Any]:
+        """
+        Sendet eine Generierungsanfrage an die Ollama-API (ältere /api/generate Endpunkt).
+        
+        Args:
+            model (str): Name des zu verwendenden Modells
+            prompt (str): Der Prompt für die Generierung
+            temperature (float, optional): Temperaturwert für die Generierung
+            max_tokens (int, optional): Maximale Anzahl an Tokens in der Antwort
+            
+        Returns:
+            Dict[str, Any]: Die Antwort des Models oder eine Fehlermeldung
+        """
+        request_body = {
+            "model": model,
+            "prompt": prompt,
+            "stream": False,
+            "options": _generation_options(model, temperature, max_tokens)
+        }
+        return await self._post("/api/generate", request_body, 30, "Generierungsanfrage")
+    
+    async def embed(self, model: str, text: str) -> Dict[str, Any]:
+        """
+        Erzeugt Embedding-Vektoren für den angegebenen Text.
+        
+        Args:
+            model (str): Name des zu verwendenden Modells
+            text (str): Der zu einbettende Text
+            
+        Returns:
+            Dict[str, Any]: Die Embedding-Vektoren oder eine Fehlermeldung
+        """
+        request_body = {
+            "model": model,
+            "prompt": text
+        }
+        return await self._post("/api/embeddings", request_body, 10, "Embedding-Anfrage")
+
 # Einzelne Client-Instanz für die Wiederverwendung
 ollama_client = OllamaClient()
\ No newline at end of file
@@ -9,21 +9,32 @@ und stellt Funktionen zur Verarbeitung dieser QR-Codes bereit.
 import json
 import base64
 import logging
+import functools
+import struct
+import zlib
 from io import BytesIO
 from typing import Dict, Any, Optional, Tuple
 
 import qrcode
 from qrcode.constants import ERROR_CORRECT_H, ERROR_CORRECT_M, ERROR_CORRECT_L, ERROR_CORRECT_Q
 
+try:
+    import segno
+except ImportError:
+    segno = None
+
+import mask_score
+
 # Konfiguration importieren
 from config import (
-    LOCAL_IP,
+    get_local_ip_cached,
     SERVER_PORT,
     OLLAMA_API_HOST,
     OLLAMA_API_PORT,
     QRCODE_ERROR_CORRECTION,
     QRCODE_BOX_SIZE,
-    QRCODE_BORDER
+    QRCODE_BORDER,
+    USE_SEGNO
 )
 
 # Logger einrichten
@@ -37,6 +48,109 @@ ERROR_CORRECTION_LEVELS = {
     'H': ERROR_CORRECT_H   # ~30% Fehlerkorrektur
 }
 
+def _install_blank_module_cache():
+    """
+    Rüstet für ältere qrcode-Versionen den Cache leerer QR-Vorlagen nach.
+    
+    Such-, Ausrichtungs- und Timing-Muster hängen nur von der Version ab und
+    werden so nicht bei jedem Maskendurchlauf neu gesetzt. Neuere qrcode-Versionen
+    bringen diesen Cache bereits mit (qrcode.main.precomputed_qr_blanks).
+    """
+    import qrcode.main
+    from qrcode import util
+    
+    if hasattr(qrcode.main, "precomputed_qr_blanks"):
+        return
+    
+    blanks = {}
+    
+    def make_impl(self, test, mask_pattern):
+        self.modules_count = self.version * 4 + 17
+        
+        blank = blanks.get(self.version)
+        if blank is None:
+            self.modules = [[None] * self.modules_count for _ in range(self.modules_count)]
+            self.setup_position_probe_pattern(0, 0)
+            self.setup_position_probe_pattern(self.modules_count - 7, 0)
+            self.setup_position_probe_pattern(0, self.modules_count - 7)
+            self.setup_position_adjust_pattern()
+            self.setup_timing_pattern()
+            blank = blanks[self.version] = [row[:] for row in self.modules]
+        self.modules = [row[:] for row in blank]
+        
+        self.setup_type_info(test, mask_pattern)
+        
+        if self.version >= 7:
+            self.setup_type_number(test)
+        
+        if self.data_cache is None:
+            self.data_cache = util.create_data(
+                self.version, self.error_correction, self.data_list
+            )
+        self.map_data(self.data_cache, mask_pattern)
+    
+    qrcode.main.QRCode.makeImpl = make_impl
+    logger.debug("Cache für leere QR-Vorlagen installiert")
+
+try:
+    _install_blank_module_cache()
+except Exception as e:
+    logger.warning(f"Cache für leere QR-Vorlagen nicht verfügbar: {e}")
+
+# Maskenbewertung mit Numba beschleunigen (nur wenn numba installiert ist)
+try:
+    mask_score.install()
+except Exception as e:
+    logger.warning(f"Numba-Maskenbewertung nicht verfügbar: {e}")
+
+if USE_SEGNO and segno is None:
+    logger.warning("USE_SEGNO ist gesetzt, segno ist aber nicht installiert; verwende qrcode")
+
+# PNG-Signatur (erste 8 Bytes jeder PNG-Datei)
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    """Baut einen PNG-Chunk aus Länge, Typ, Daten und CRC."""
+    crc = zlib.crc32(tag + data) & 0xFFFFFFFF
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", crc)
+
+def _matrix_to_png(matrix, box_size: int) -> bytes:
+    """
+    Schreibt eine QR-Matrix als schwarz-weißes PNG mit 1 Bit pro Pixel.
+    
+    Args:
+        matrix (List[List[bool]]): QR-Matrix inkl. Rand (True = dunkles Modul)
+        box_size (int): Kantenlänge eines Moduls in Pixeln
+        
+    Returns:
+        bytes: Die PNG-Datei
+    """
+    size = len(matrix) * box_size
+    row_bytes = (size + 7) // 8
+    padding = "0" * (row_bytes * 8 - size)
+    # Graustufen mit 1 Bit: 0 = schwarz, 1 = weiß
+    dark = "0" * box_size
+    light = "1" * box_size
+    
+    scanlines = []
+    for row in matrix:
+        bits = "".join(dark if module else light for module in row) + padding
+        # Filterbyte 0 (None) vor jeder Zeile, Zeile box_size-mal wiederholen
+        scanline = b"\x00" + int(bits, 2).to_bytes(row_bytes, "big")
+        scanlines.append(scanline * box_size)
+    
+    ihdr = struct.pack(">IIBBBBB", size, size, 1, 0, 0, 0, 0)
+    return b"".join((
+        _PNG_SIGNATURE,
+        _png_chunk(b"IHDR", ihdr),
+        _png_chunk(b"IDAT", zlib.compress(b"".join(scanlines))),
+        _png_chunk(b"IEND", b"")
+    ))
+
+# Pflichtfelder und gültige Typen für QR-Code-Daten
+QR_REQUIRED_FIELDS = frozenset(("type", "ip", "port"))
+QR_VALID_TYPES = frozenset(("ollama_server", "ollama_backend"))
+
 def create_connection_data(server_name: str = None, 
                            ip_address: str = None, 
                            port: int = None) -> Dict[str, Any]:
@@ -52,10 +166,11 @@ def create_connection_data(server_name: str = None,
         Dict[str, Any]: Verbindungsdaten als Dictionary
     """
     # Standardwerte verwenden, wenn keine angegeben wurden
+    local_ip = get_local_ip_cached()
     if server_name is None:
-        server_name = f"Ollama-Server ({LOCAL_IP})"
+        server_name = f"Ollama-Server ({local_ip})"
     if ip_address is None:
-        ip_address = LOCAL_IP
+        ip_address = local_ip
     if port is None:
         port = OLLAMA_API_PORT
     
@@ -70,6 +185,102 @@ def create_connection_data(server_name: str = None,
     logger.debug(f"Verbindungsdaten erstellt: {connection_data}")
     return connection_data
 
+@functools.lru_cache(maxsize=64)
+def _generate_qr_png_bytes(json_data: str,
+                           error_correction: str,
+                           box_size: int,
+                           border: int) -> bytes:
+    """
+    Erzeugt das PNG-Bild eines QR-Codes.
+    
+    Die Ergebnisse werden für identische Eingaben zwischengespeichert, da sich
+    die Verbindungsdaten (IP, Ports, Namen) praktisch nie ändern.
+    
+    Args:
+        json_data (str): Die zu kodierenden Daten als JSON-String
+        error_correction (str): Fehlerkorrektur-Level (L, M, Q, H)
+        box_size (int): Größe eines Quadrats im QR-Code
+        border (int): Breite des Randes in Quadraten
+        
+    Returns:
+        bytes: PNG-Bild
+    """
+    if error_correction not in ERROR_CORRECTION_LEVELS:
+        error_correction = "H"  # Standardmäßig hohe Fehlerkorrektur
+    
+    if USE_SEGNO and segno is not None:
+        return _render_png_segno(json_data, error_correction, box_size, border)
+    return _render_png_qrcode(json_data, error_correction, box_size, border)
+
+@functools.lru_cache(maxsize=64)
+def _generate_qr_code_cached(json_data: str,
+                             error_correction: str,
+                             box_size: int,
+                             border: int) -> str:
+    """Wie _generate_qr_png_bytes, liefert das PNG aber als Base64-String."""
+    png = _generate_qr_png_bytes(json_data, error_correction, box_size, border)
+    return base64.b64encode(png).decode()
+
+def _render_png_qrcode(json_data: str, error_correction: str, box_size: int, border: int) -> bytes:
+    """Erzeugt den QR-Code mit der qrcode-Bibliothek und schreibt ihn als PNG."""
+    # QR-Code-Objekt erstellen
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=ERROR_CORRECTION_LEVELS[error_correction],
+        box_size=box_size,
+        border=border
+    )
+    
+    # Daten hinzufügen und QR-Code generieren
+    qr.add_data(json_data)
+    qr.make(fit=True)
+    
+    # QR-Code direkt als 1-Bit-PNG schreiben
+    return _matrix_to_png(qr.get_matrix(), box_size)
+
+def _render_png_segno(json_data: str, error_correction: str, box_size: int, border: int) -> bytes:
+    """Erzeugt den QR-Code mit segno, das PNGs selbst schreibt."""
+    qr = segno.make_qr(json_data, error=error_correction, boost_error=False)
+    buffered = BytesIO()
+    qr.save(buffered, kind="png", scale=box_size, border=border)
+    return buffered.getvalue()
+
+def _qr_options(error_correction: Optional[str],
+                box_size: Optional[int],
+                border: Optional[int]) -> Tuple[str, int, int]:
+    """Ergänzt fehlende QR-Optionen um die Werte aus der Konfiguration."""
+    if error_correction is None:
+        error_correction = QRCODE_ERROR_CORRECTION
+    if box_size is None:
+        box_size = QRCODE_BOX_SIZE
+    if border is None:
+        border = QRCODE_BORDER
+    return error_correction.upper(), box_size, border
+
+def generate_qr_png(data: Dict[str, Any],
+                    error_correction: str = None,
+                    box_size: int = None,
+                    border: int = None) -> bytes:
+    """
+    Generiert einen QR-Code als PNG-Bytes (ohne Base64-Kodierung).
+    
+    Args:
+        data (Dict[str, Any]): Die Verbindungsdaten als Dictionary
+        error_correction (str, optional): Fehlerkorrektur-Level (L, M, Q, H)
+        box_size (int, optional): Größe eines Quadrats im QR-Code
+        border (int, optional): Breite des Randes in Quadraten
+        
+    Returns:
+        bytes: PNG-Bild
+    """
+    options = _qr_options(error_correction, box_size, border)
+    
+    try:
+        return _generate_qr_png_bytes(json.dumps(data), *options)
+    except Exception as e:
+        logger.error(f"Fehler bei der QR-Code-Generierung: {e}")
+        raise
+
 def generate_qr_code(data: Dict[str, Any], 
                      error_correction: str = None, 
                      box_size: int = None, 
@@ -87,42 +298,12 @@ def generate_qr_code(data: Dict[str, Any],
         Tuple[str, Dict[str, Any]]: Base64-kodierter QR-Code und die Verbindungsdaten
     """
     # Standardwerte aus der Konfiguration verwenden, wenn nicht angegeben
-    if error_correction is None:
-        error_correction = QRCODE_ERROR_CORRECTION
-    if box_size is None:
-        box_size = QRCODE_BOX_SIZE
-    if border is None:
-        border = QRCODE_BORDER
-    
-    # Fehlerkorrektur-Level auswählen
-    error_level = ERROR_CORRECTION_LEVELS.get(
-        error_correction.upper(), 
-        ERROR_CORRECT_H  # Standardmäßig hohe Fehlerkorrektur
-    )
+    options = _qr_options(error_correction, box_size, border)
     
     try:
-        # Daten in JSON umwandeln
+        # Daten in JSON umwandeln und QR-Code erzeugen (bzw. aus dem Cache holen)
         json_data = json.dumps(data)
-        
-        # QR-Code-Objekt erstellen
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=error_level,
-            box_size=box_size,
-            border=border
-        )
-        
-        # Daten hinzufügen und QR-Code generieren
-        qr.add_data(json_data)
-        qr.make(fit=True)
-        
-        # QR-Code als Bild erzeugen
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Bild in Base64 umwandeln
-        buffered = BytesIO()
-        img.save(buffered, format="PNG")
-        img_str = base64.b64encode(buffered.getvalue()).decode()
+        img_str = _generate_qr_code_cached(json_data, *options)
         
         logger.info(f"QR-Code generiert für Server: {data.get('name')}")
         return f"data:image/png;base64,{img_str}", data
@@ -131,6 +312,36 @@ def generate_qr_code(data: Dict[str, Any],
         logger.error(f"Fehler bei der QR-Code-Generierung: {e}")
         raise
 
+# Vorlagen der Verbindungsdaten; die Schlüsselreihenfolge bestimmt den QR-Inhalt
+_SERVER_TMPL = {"type": "ollama_server", "name": None, "ip": None, "port": str(OLLAMA_API_PORT)}
+_BACKEND_TMPL = {"type": "ollama_backend", "name": None, "ip": None, "port": str(SERVER_PORT)}
+
+# Art -> (Vorlage, Präfix des Standardnamens)
+_CONNECTION_TEMPLATES = {
+    "server": (_SERVER_TMPL, "Ollama-Server"),
+    "backend": (_BACKEND_TMPL, "Ollama-Backend")
+}
+
+def _connection_data(kind: str,
+                     server_name: Optional[str],
+                     custom_ip: Optional[str]) -> Dict[str, Any]:
+    """Füllt die Vorlage der angegebenen Art mit Name und IP."""
+    template, label = _CONNECTION_TEMPLATES[kind]
+    local_ip = get_local_ip_cached()
+    
+    # Nur Name und IP sind variabel
+    connection_data = template.copy()
+    connection_data["name"] = server_name or f"{label} ({local_ip})"
+    connection_data["ip"] = custom_ip or local_ip
+    return connection_data
+
+@functools.lru_cache(maxsize=64)
+def _generate_connection_qr_cached(kind: str,
+                                   server_name: Optional[str],
+                                   custom_ip: Optional[str]) -> Tuple[str, Dict[str, Any]]:
+    """Erzeugt einen Verbindungs-QR-Code aus einer Vorlage; Ergebnisse werden zwischengespeichert."""
+    return generate_qr_code(_connection_data(kind, server_name, custom_ip))
+
 def generate_server_qr(server_name: str = None, 
                        custom_ip: str = None) -> Tuple[str, Dict[str, Any]]:
     """
@@ -143,15 +354,9 @@ def generate_server_qr(server_name: str = None,
     Returns:
         Tuple[str, Dict[str, Any]]: Base64-kodierter QR-Code und die Verbindungsdaten
     """
-    # Verbindungsdaten erstellen
-    server_data = create_connection_data(
-        server_name=server_name,
-        ip_address=custom_ip or LOCAL_IP,
-        port=OLLAMA_API_PORT
-    )
-    
-    # QR-Code generieren
-    return generate_qr_code(server_data)
+    qr_code, server_data = _generate_connection_qr_cached("server", server_name, custom_ip)
+    # Kopie zurückgeben, damit Aufrufer den Cache-Eintrag nicht verändern
+    return qr_code, dict(server_data)
 
 def generate_backend_qr(server_name: str = None,
                         custom_ip: str = None) -> Tuple[str, Dict[str, Any]]:
@@ -165,16 +370,29 @@ def generate_backend_qr(server_name: str = None,
     Returns:
         Tuple[str, Dict[str, Any]]: Base64-kodierter QR-Code und die Verbindungsdaten
     """
-    # Verbindungsdaten erstellen
-    server_data = {
-        "type": "ollama_backend",
-        "name": server_name or f"Ollama-Backend ({LOCAL_IP})",
-        "ip": custom_ip or LOCAL_IP,
-        "port": str(SERVER_PORT)
-    }
+    qr_code, server_data = _generate_connection_qr_cached("backend", server_name, custom_ip)
+    # Kopie zurückgeben, damit Aufrufer den Cache-Eintrag nicht verändern
+    return qr_code, dict(server_data)
+
+def generate_server_qr_png(server_name: str = None,
+                           custom_ip: str = None) -> bytes:
+    """
+    Generiert den QR-Code für den aktuellen Server als PNG-Bytes.
     
-    # QR-Code generieren
-    return generate_qr_code(server_data)
+    Args:
+        server_name (str, optional): Name des Servers
+        custom_ip (str, optional): Benutzerdefinierte IP-Adresse
+        
+    Returns:
+        bytes: PNG-Bild
+    """
+    return generate_qr_png(_connection_data("server", server_name, custom_ip))
+
+def clear_qr_cache() -> None:
+    """Leert alle zwischengespeicherten QR-Codes (z. B. nach einer IP-Änderung)."""
+    _generate_qr_png_bytes.cache_clear()
+    _generate_qr_code_cached.cache_clear()
+    _generate_connection_qr_cached.cache_clear()
 
 def verify_qr_data(qr_data: Dict[str, Any]) -> bool:
     """
@@ -186,23 +404,21 @@ def verify_qr_data(qr_data: Dict[str, Any]) -> bool:
     Returns:
         bool: True, wenn die Daten gültig sind, sonst False
     """
-    required_fields = ["type", "ip", "port"]
-    
     # Prüfen, ob alle erforderlichen Felder vorhanden sind
-    if not all(field in qr_data for field in required_fields):
+    if not QR_REQUIRED_FIELDS.issubset(qr_data):
         logger.warning(f"Ungültige QR-Code-Daten: Fehlende Felder")
         return False
     
     # Prüfen, ob der Typ korrekt ist
-    if qr_data["type"] not in ["ollama_server", "ollama_backend"]:
+    qr_type = qr_data["type"]
+    if not isinstance(qr_type, str) or qr_type not in QR_VALID_TYPES:
         logger.warning(f"Ungültiger QR-Code-Typ: {qr_data.get('type')}")
         return False
     
     # Prüfen, ob der Port eine Zahl ist
-    try:
-        int(qr_data["port"])
-    except ValueError:
+    port = qr_data["port"]
+    if not (isinstance(port, int) or (isinstance(port, str) and port.isdecimal())):
         logger.warning(f"Ungültiger Port im QR-Code: {qr_data.get('port')}")
         return False
     
-    return True
\ No newline at end of file
+    return True
@@ -8,17 +8,21 @@ des Ollama Chat Backends bereitstellt.
 
 import os
 import sys
-import json
 import time
+import signal
+import socket
 import logging
 import argparse
 import threading
 import webbrowser
 from pathlib import Path
+from collections import OrderedDict
 from typing import Dict, Any, List, Optional, Union
 
 from flask import Flask, request, jsonify, Response, send_from_directory
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+from werkzeug.exceptions import NotFound
 
 # Lokale Module importieren
 try:
@@ -29,28 +33,32 @@ try:
         LOG_LEVEL,
         LOG_FORMAT,
         DEFAULT_MODEL,
-        LOCAL_IP,
+        get_local_ip_cached,
         DATABASE_PATH
     )
     from database import (
         init_db,
         create_chat,
         add_message,
+        add_messages,
         get_chat,
         get_all_chats,
-        get_chat_messages,
+        get_chat_history,
         delete_chat,
         save_server,
         get_default_server,
         get_all_servers,
         update_server_connection
     )
+    import json_utils
     from ollama_client import (
         ollama_client
     )
     from qr_handler import (
         generate_server_qr,
         generate_backend_qr,
+        generate_server_qr_png,
+        clear_qr_cache,
         verify_qr_data
     )
 except ImportError as e:
@@ -58,23 +66,142 @@ except ImportError as e:
     print("Bitte stellen Sie sicher, dass alle erforderlichen Dateien vorhanden sind.")
     sys.exit(1)
 
-# Logger einrichten
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL),
-    format=LOG_FORMAT
-)
+# Logger einrichten (Konfiguration erfolgt beim direkten Start, siehe unten)
 logger = logging.getLogger("OllamaServer")
 
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    JSON-Provider für Flask, der über json_utils orjson verwendet.
+    
+    Objekte, die orjson nicht serialisieren kann, übernimmt der Standard-Provider.
+    """
+    
+    def dumps(self, obj, **kwargs):
+        try:
+            return json_utils.dumps(obj).decode("utf-8")
+        except TypeError:
+            return super().dumps(obj, **kwargs)
+    
+    def loads(self, s, **kwargs):
+        return json_utils.loads(s)
+
 # Flask-App initialisieren
 app = Flask(__name__)
+if json_utils.orjson is not None:
+    app.json = OrjsonProvider(app)  # Antworten und request.json über orjson
 CORS(app)  # Cross-Origin Resource Sharing aktivieren
 
-# Datenbank initialisieren
-try:
-    init_db()
-except Exception as e:
-    logger.error(f"Fehler bei der Datenbankinitialisierung: {e}")
-    sys.exit(1)
+# Vorberechnete QR-Codes für die Standardverbindung (ohne eigenen Namen/IP)
+_DEFAULT_QR = {}
+
+# Browser und Proxys dürfen QR-Code-Antworten eine Stunde zwischenspeichern
+QR_CACHE_CONTROL = "public, max-age=3600"
+
+def _precompute_default_qr():
+    """
+    Erzeugt die Standard-QR-Codes für Server und Backend und legt sie im Speicher ab.
+    
+    Die Codes werden in einem neuen Dict aufgebaut, das erst danach das alte
+    ersetzt; laufende Anfragen sehen so immer ein vollständiges Dict.
+    """
+    global _DEFAULT_QR
+    default_qr = {}
+    try:
+        default_qr["server"] = generate_server_qr()
+        default_qr["backend"] = generate_backend_qr()
+    except Exception as e:
+        logger.error(f"Fehler beim Vorberechnen der QR-Codes: {e}")
+    _DEFAULT_QR = default_qr
+
+def _reload_default_qr(signum, frame):
+    """SIGHUP-Handler: Ermittelt die lokale IP neu und erzeugt die Standard-QR-Codes neu."""
+    logger.info("SIGHUP empfangen, QR-Codes werden neu erzeugt")
+    get_local_ip_cached.cache_clear()
+    clear_qr_cache()
+    _precompute_default_qr()
+
+def _install_sighup_handler():
+    """
+    Registriert _reload_default_qr für SIGHUP.
+    
+    Wird nur beim Start über run_server aufgerufen, damit Prozesse, die das
+    Modul nur importieren (z. B. WSGI-Server), ihr eigenes SIGHUP-Verhalten behalten.
+    """
+    if not hasattr(signal, "SIGHUP"):
+        return
+    # Signal-Handler können nur im Haupt-Thread registriert werden
+    try:
+        signal.signal(signal.SIGHUP, _reload_default_qr)
+    except ValueError:
+        logger.debug("SIGHUP-Handler nicht registriert (nicht im Haupt-Thread)")
+
+# Einmalige Initialisierung beim ersten Bedarf statt beim Import
+_init_done = threading.Event()
+_init_lock = threading.Lock()
+
+def ensure_initialized():
+    """Initialisiert die Datenbank und berechnet die Standard-QR-Codes vor (nur einmal)."""
+    if _init_done.is_set():
+        return
+    with _init_lock:
+        if _init_done.is_set():
+            return
+        init_db()
+        _precompute_default_qr()
+        _init_done.set()
+
+@app.before_request
+def _initialize_before_request():
+    """Stellt vor jeder Anfrage sicher, dass die Initialisierung erfolgt ist."""
+    try:
+        ensure_initialized()
+    except Exception as e:
+        logger.error(f"Fehler bei der Datenbankinitialisierung: {e}")
+        return jsonify({"error": f"Datenbank konnte nicht initialisiert werden: {str(e)}"}), 500
+
+def make_required_validator(*keys):
+    """
+    Erzeugt eine Prüffunktion für Pflichtfelder eines Request-Bodys.
+    
+    Die Funktion wird als Quelltext mit einer festen Kette von in-Prüfungen
+    erzeugt und kompiliert, so dass pro Aufruf weder Liste noch Generator
+    angelegt werden.
+    
+    Args:
+        *keys (str): Namen der Pflichtfelder
+        
+    Returns:
+        Callable[[Any], bool]: True, wenn ein Dictionary alle Felder enthält
+    """
+    for key in keys:
+        if not isinstance(key, str):
+            raise TypeError(f"Feldname muss ein String sein: {key!r}")
+    
+    source = "def validate(d): return isinstance(d, dict)" + "".join(f" and {key!r} in d" for key in keys)
+    namespace = {}
+    exec(source, namespace)
+    return namespace["validate"]
+
+# Werte, die in Query-Parametern als "wahr" gelten
+_TRUTHY = frozenset(("true", "1", "yes", "on"))
+
+def qbool(key: str, default: bool = False) -> bool:
+    """
+    Liest einen booleschen Query-Parameter der aktuellen Anfrage.
+    
+    Args:
+        key (str): Name des Parameters
+        default (bool, optional): Rückgabewert, wenn der Parameter fehlt oder leer ist
+        
+    Returns:
+        bool: True bei true/1/yes/on (ohne Beachtung der Groß-/Kleinschreibung)
+    """
+    value = request.args.get(key)
+    return value.lower() in _TRUTHY if value else default
+
+# Pflichtfelder der Endpunkte
+_chat_valid = make_required_validator('model', 'message')
+_connect_valid = make_required_validator('name', 'ip', 'port')
 
 # API-Endpunkte
 
@@ -98,7 +225,7 @@ def get_models():
     Returns:
         JSON-Antwort mit der Liste der verfügbaren Modelle
     """
-    force_refresh = request.args.get('force_refresh', 'false').lower() == 'true'
+    force_refresh = qbool('force_refresh')
     
     result = ollama_client.get_models(force_refresh=force_refresh)
     if "error" in result:
@@ -124,7 +251,7 @@ def chat():
     data = request.json
     
     # Pflichtfelder überprüfen
-    if not data or not all(key in data for key in ['model', 'message']):
+    if not _chat_valid(data):
         return jsonify({"error": "Modell und Nachricht sind erforderlich"}), 400
     
     model = data.get('model', DEFAULT_MODEL)
@@ -134,11 +261,7 @@ def chat():
     max_tokens = data.get('max_tokens')
     
     # Chat-Historie laden, falls vorhanden
-    history = []
-    if chat_id:
-        messages = get_chat_messages(chat_id)
-        if messages:
-            history = [{"role": msg["role"], "content": msg["content"]} for msg in messages]
+    history = get_chat_history(chat_id) if chat_id else []
     
     # Anfrage an Ollama senden
     response = ollama_client.chat(
@@ -159,12 +282,12 @@ def chat():
             title = message[:50] + ('...' if len(message) > 50 else '')
             chat_id = create_chat(title, model)
         
-        # Benutzernachricht speichern
-        user_message_id = add_message(chat_id, "user", message)
-        
-        # Assistentennachricht speichern
+        # Benutzer- und Assistentennachricht gemeinsam speichern
         assistant_content = response.get("message", {}).get("content", "")
-        assistant_message_id = add_message(chat_id, "assistant", assistant_content)
+        user_message_id, assistant_message_id = add_messages(chat_id, [
+            ("user", message),
+            ("assistant", assistant_content)
+        ])
         
         return jsonify({
             "chat_id": chat_id,
@@ -180,6 +303,14 @@ def chat():
             "error": str(e)
         })
 
+# Rahmen eines Server-Sent-Events, einmalig als Bytes kodiert
+SSE_PREFIX = b"data: "
+SSE_SUFFIX = b"\n\n"
+
+def _sse(payload: Dict[str, Any]) -> bytes:
+    """Kodiert ein Dictionary als Server-Sent-Event."""
+    return SSE_PREFIX + json_utils.dumps(payload) + SSE_SUFFIX
+
 @app.route('/api/chat/stream', methods=['POST'])
 def stream_chat():
     """
@@ -198,7 +329,7 @@ def stream_chat():
     data = request.json
     
     # Pflichtfelder überprüfen
-    if not data or not all(key in data for key in ['model', 'message']):
+    if not _chat_valid(data):
         return jsonify({"error": "Modell und Nachricht sind erforderlich"}), 400
     
     model = data.get('model', DEFAULT_MODEL)
@@ -208,15 +339,13 @@ def stream_chat():
     max_tokens = data.get('max_tokens')
     
     # Chat-Historie laden, falls vorhanden
-    history = []
-    if chat_id:
-        messages = get_chat_messages(chat_id)
-        if messages:
-            history = [{"role": msg["role"], "content": msg["content"]} for msg in messages]
+    history = get_chat_history(chat_id) if chat_id else []
     
     def generate():
-        # Variablen für die vollständige Antwort
-        full_response = ""
+        nonlocal chat_id
+        
+        # Teilantworten sammeln und erst am Ende zusammenfügen
+        parts = []
         chat_created = False
         
         # Chat erstellen, falls keiner vorhanden
@@ -225,8 +354,7 @@ def stream_chat():
             new_chat_id = create_chat(title, model)
             # Benutzernachricht speichern
             add_message(new_chat_id, "user", message)
-            yield f"data: {json.dumps({'chat_id': new_chat_id})}\n\n"
-            nonlocal chat_id
+            yield _sse({'chat_id': new_chat_id})
             chat_id = new_chat_id
             chat_created = True
         elif not chat_created:
@@ -243,25 +371,26 @@ def stream_chat():
                 max_tokens=max_tokens
             ):
                 if "error" in chunk:
-                    yield f"data: {json.dumps({'error': chunk['error']})}\n\n"
+                    yield _sse({'error': chunk['error']})
                     return
                 
                 if "message" in chunk and "content" in chunk["message"]:
                     content = chunk["message"]["content"]
-                    full_response += content
-                    yield f"data: {json.dumps({'content': content})}\n\n"
+                    parts.append(content)
+                    yield _sse({'content': content})
             
             # Assistentennachricht speichern
-            assistant_message_id = add_message(chat_id, "assistant", full_response)
+            assistant_message_id = add_message(chat_id, "assistant", "".join(parts))
             
             # Abschluss-Event senden
-            yield f"data: {json.dumps({'done': True, 'message_id': assistant_message_id})}\n\n"
+            yield _sse({'done': True, 'message_id': assistant_message_id})
             
         except Exception as e:
             logger.error(f"Fehler beim Streaming: {e}")
-            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            yield _sse({'error': str(e)})
     
-    return Response(generate(), mimetype='text/event-stream')
+    # Die Events sind bereits Bytes und werden unverändert durchgereicht
+    return Response(generate(), mimetype='text/event-stream', direct_passthrough=True)
 
 @app.route('/api/chats', methods=['GET'])
 def get_chats():
@@ -330,11 +459,39 @@ def generate_server_qrcode():
         custom_ip = data.get('ip')
     
     try:
-        qr_code, server_data = generate_server_qr(server_name, custom_ip)
-        return jsonify({
+        # Standardfall ohne eigene Angaben direkt aus dem Speicher bedienen
+        cached = _DEFAULT_QR.get("server") if server_name is None and custom_ip is None else None
+        if cached is not None:
+            qr_code, server_data = cached
+        else:
+            qr_code, server_data = generate_server_qr(server_name, custom_ip)
+        response = jsonify({
             "qrcode": qr_code,
             "server": server_data
         })
+        response.headers["Cache-Control"] = QR_CACHE_CONTROL
+        return response
+    except Exception as e:
+        logger.error(f"Fehler bei der QR-Code-Generierung: {e}")
+        return jsonify({"error": f"QR-Code konnte nicht generiert werden: {str(e)}"}), 500
+
+@app.route('/api/qrcode/server.png', methods=['GET'])
+def generate_server_qrcode_png():
+    """
+    Liefert den QR-Code für die Verbindung mit dem Ollama-Server als PNG-Bild.
+    
+    GET-Parameter:
+        name (str, optional): Name des Servers
+        ip (str, optional): IP-Adresse des Servers
+        
+    Returns:
+        PNG-Bild (image/png) ohne Base64-Kodierung
+    """
+    try:
+        png = generate_server_qr_png(request.args.get('name'), request.args.get('ip'))
+        response = Response(png, mimetype='image/png')
+        response.headers["Cache-Control"] = QR_CACHE_CONTROL
+        return response
     except Exception as e:
         logger.error(f"Fehler bei der QR-Code-Generierung: {e}")
         return jsonify({"error": f"QR-Code konnte nicht generiert werden: {str(e)}"}), 500
@@ -361,15 +518,69 @@ def generate_backend_qrcode():
         custom_ip = data.get('ip')
     
     try:
-        qr_code, server_data = generate_backend_qr(server_name, custom_ip)
-        return jsonify({
+        # Standardfall ohne eigene Angaben direkt aus dem Speicher bedienen
+        cached = _DEFAULT_QR.get("backend") if server_name is None and custom_ip is None else None
+        if cached is not None:
+            qr_code, server_data = cached
+        else:
+            qr_code, server_data = generate_backend_qr(server_name, custom_ip)
+        response = jsonify({
             "qrcode": qr_code,
             "server": server_data
         })
+        response.headers["Cache-Control"] = QR_CACHE_CONTROL
+        return response
     except Exception as e:
         logger.error(f"Fehler bei der QR-Code-Generierung: {e}")
         return jsonify({"error": f"QR-Code konnte nicht generiert werden: {str(e)}"}), 500
 
+# Erfolgreiche Verbindungstests werden kurz zwischengespeichert (URL -> (Zeitpunkt, Modelle))
+CONNECT_CACHE_TTL = 5.0
+_CONNECT_CACHE: Dict[str, tuple] = {}
+
+# Test-Clients je URL wiederverwenden, damit Keep-Alive-Verbindungen erhalten bleiben
+MAX_TEST_CLIENTS = 16
+_test_clients: "OrderedDict[str, Any]" = OrderedDict()
+_test_clients_lock = threading.Lock()
+
+def _get_test_client(url: str):
+    """Liefert einen (wiederverwendeten) Client für die angegebene Server-URL."""
+    with _test_clients_lock:
+        client = _test_clients.get(url)
+        if client is not None:
+            _test_clients.move_to_end(url)
+            return client
+        client = ollama_client.__class__(api_url=url)
+        _test_clients[url] = client
+        # Älteste Clients verwerfen, da die URLs vom Benutzer stammen
+        while len(_test_clients) > MAX_TEST_CLIENTS:
+            _test_clients.popitem(last=False)
+        return client
+
+def _test_server_connection(url: str) -> Dict[str, Any]:
+    """
+    Ruft die Modelle eines Servers ab, um die Verbindung zu testen.
+    
+    Erfolgreiche Ergebnisse werden CONNECT_CACHE_TTL Sekunden lang wiederverwendet.
+    
+    Args:
+        url (str): URL des Ollama-Servers
+        
+    Returns:
+        Dict[str, Any]: Modellliste oder Fehlermeldung
+    """
+    cached = _CONNECT_CACHE.get(url)
+    if cached is not None and time.monotonic() - cached[0] < CONNECT_CACHE_TTL:
+        return cached[1]
+    
+    # Beim Test immer den Server fragen, nicht den Modell-Cache des Clients
+    result = _get_test_client(url).get_models(force_refresh=True)
+    if "error" not in result:
+        if len(_CONNECT_CACHE) >= MAX_TEST_CLIENTS:
+            _CONNECT_CACHE.clear()
+        _CONNECT_CACHE[url] = (time.monotonic(), result)
+    return result
+
 @app.route('/api/server/connect', methods=['POST'])
 def connect_server():
     """
@@ -387,7 +598,7 @@ def connect_server():
     data = request.json
     
     # Pflichtfelder überprüfen
-    if not data or not all(key in data for key in ['name', 'ip', 'port']):
+    if not _connect_valid(data):
         return jsonify({"error": "Name, IP-Adresse und Port sind erforderlich"}), 400
     
     name = data.get('name')
@@ -400,9 +611,7 @@ def connect_server():
     
     # Verbindung testen
     try:
-        # Temporären Client erstellen für den Test
-        test_client = ollama_client.__class__(api_url=url)
-        result = test_client.get_models()
+        result = _test_server_connection(url)
         
         if "error" in result:
             return jsonify({"success": False, "error": result["error"]}), 500
@@ -446,6 +655,26 @@ def get_default_server_info():
         return jsonify({"error": "Kein Standard-Server gefunden"}), 404
 
 # Statische Dateien (falls vorhanden)
+STATIC_DIR = Path(__file__).resolve().parent / 'static'
+STATIC_MAX_AGE = 86400  # Sekunden, die Browser statische Dateien zwischenspeichern dürfen
+
+# API-Informationsseite, die ohne Frontend unter / ausgeliefert wird (einmalig serialisiert)
+_API_INFO_JSON = json_utils.dumps({
+    "name": "Ollama Chat Backend API",
+    "version": "1.0.0",
+    "endpoints": {
+        "/api/health": "Server-Status prüfen",
+        "/api/models": "Verfügbare Modelle abrufen",
+        "/api/chat": "Chat-Nachricht senden",
+        "/api/chat/stream": "Chat-Nachricht mit Stream-Antwort senden",
+        "/api/chats": "Alle Chats abrufen",
+        "/api/qrcode/server": "QR-Code für Ollama-Server generieren",
+        "/api/qrcode/server.png": "QR-Code für Ollama-Server als PNG-Bild",
+        "/api/qrcode/backend": "QR-Code für Backend-Server generieren",
+        "/api/server/connect": "Mit Ollama-Server verbinden"
+    }
+})
+
 @app.route('/', defaults={'path': 'index.html'})
 @app.route('/<path:path>')
 def static_files(path):
@@ -453,29 +682,47 @@ def static_files(path):
     Stellt statische Dateien aus dem static-Verzeichnis bereit, falls vorhanden.
     Falls nicht, gibt einen Statuscode 404 zurück.
     """
-    static_dir = Path(__file__).parent / 'static'
-    if static_dir.exists() and (static_dir / path).exists():
-        return send_from_directory('static', path)
-    else:
+    try:
+        # Mit ETag/Last-Modified, unveränderte Dateien werden mit 304 beantwortet
+        return send_from_directory(STATIC_DIR, path, max_age=STATIC_MAX_AGE, conditional=True)
+    except NotFound:
         # API-Informationsseite anzeigen, wenn kein Frontend vorhanden ist
         if path == 'index.html':
-            api_info = {
-                "name": "Ollama Chat Backend API",
-                "version": "1.0.0",
-                "endpoints": {
-                    "/api/health": "Server-Status prüfen",
-                    "/api/models": "Verfügbare Modelle abrufen",
-                    "/api/chat": "Chat-Nachricht senden",
-                    "/api/chat/stream": "Chat-Nachricht mit Stream-Antwort senden",
-                    "/api/chats": "Alle Chats abrufen",
-                    "/api/qrcode/server": "QR-Code für Ollama-Server generieren",
-                    "/api/qrcode/backend": "QR-Code für Backend-Server generieren",
-                    "/api/server/connect": "Mit Ollama-Server verbinden"
-                }
-            }
-            return jsonify(api_info)
+            return Response(_API_INFO_JSON, mimetype='application/json')
         return jsonify({"error": "Datei nicht gefunden"}), 404
 
+# Der Browser wird pro Prozess höchstens einmal geöffnet
+_browser_opened = threading.Event()
+
+def _open_browser_when_ready(url: str, host: str, port: int, timeout: float = 30.0):
+    """
+    Öffnet den Browser, sobald der Server Verbindungen annimmt.
+    
+    Args:
+        url (str): Zu öffnende URL
+        host (str): Host, an den der Server gebunden ist
+        port (int): Port des Servers
+        timeout (float, optional): Maximale Wartezeit in Sekunden
+    """
+    if _browser_opened.is_set():
+        return
+    _browser_opened.set()
+    
+    # Bei Bindung an alle Interfaces über Loopback prüfen
+    probe_host = {"0.0.0.0": "127.0.0.1", "::": "::1", "": "127.0.0.1"}.get(host, host)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((probe_host, port), timeout=0.5):
+                break
+        except OSError:
+            time.sleep(0.1)
+    else:
+        logger.warning(f"Server nach {timeout:.0f} s nicht erreichbar, Browser wird nicht geöffnet")
+        return
+    
+    webbrowser.open(url)
+
 # Server-Start-Funktion
 def run_server(host=None, port=None, debug=None, open_browser=True):
     """
@@ -491,20 +738,37 @@ def run_server(host=None, port=None, debug=None, open_browser=True):
     port = port or SERVER_PORT
     debug = debug if debug is not None else DEBUG_MODE
     
+    # Datenbank vor dem Start initialisieren, damit Fehler sofort auffallen
+    ensure_initialized()
+    _install_sighup_handler()
+    
     # IP-Adresse und Port anzeigen
-    server_url = f"http://{LOCAL_IP}:{port}"
+    server_url = f"http://{get_local_ip_cached()}:{port}"
     logger.info(f"Server wird gestartet auf {server_url}")
     logger.info(f"Datenbank: {DATABASE_PATH}")
     
-    # Browser öffnen
-    if open_browser:
-        threading.Timer(1.5, lambda: webbrowser.open(server_url)).start()
+    # Browser öffnen, sobald der Server lauscht. Im Debug-Modus läuft der Server in
+    # einem Kindprozess des Reloaders (WERKZEUG_RUN_MAIN=true), der bei jeder
+    # Änderung neu startet; geöffnet wird deshalb nur aus dem Elternprozess.
+    if open_browser and os.environ.get("WERKZEUG_RUN_MAIN") != "true":
+        threading.Thread(
+            target=_open_browser_when_ready,
+            args=(server_url, host, port),
+            name="BrowserOpener",
+            daemon=True
+        ).start()
     
     # Server starten
     app.run(host=host, port=port, debug=debug)
 
 # Hauptfunktion
 if __name__ == "__main__":
+    # Logging nur beim direkten Start konfigurieren
+    logging.basicConfig(
+        level=getattr(logging, LOG_LEVEL),
+        format=LOG_FORMAT
+    )
+    
     # Kommandozeilenargumente parsen
     parser = argparse.ArgumentParser(description="Ollama Chat Backend Server")
     parser.add_argument('--host', type=str, help=f"Host (Standard: {SERVER_HOST})")
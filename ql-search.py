@@ -4,7 +4,9 @@ import socket
 import subprocess
 import os
 import sys
+import time
 import platform
+import functools
 from datetime import datetime
 
 def install_package(package):
@@ -33,6 +35,11 @@ except ImportError:
 # Ollama-Port
 OLLAMA_PORT = 11434
 
+# Ergebnis der Ollama-Prüfung wird kurz zwischengespeichert (Zeitpunkt, Ergebnis)
+OLLAMA_CHECK_TTL = 2.0
+_ollama_check = (float("-inf"), False)
+
+@functools.lru_cache(maxsize=1)
 def get_local_ip():
     """Ermittelt die lokale IP-Adresse des Computers"""
     try:
@@ -57,15 +64,23 @@ def get_local_ip():
         return ip
 
 def check_ollama_running():
-    """Überprüft, ob Ollama auf dem angegebenen Port läuft"""
+    """Überprüft, ob Ollama auf dem angegebenen Port läuft (Ergebnis gilt 2 Sekunden)"""
+    global _ollama_check
+    checked_at, running = _ollama_check
+    if time.monotonic() - checked_at < OLLAMA_CHECK_TTL:
+        return running
+    
     try:
         s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         s.settimeout(1)
         result = s.connect_ex(('localhost', OLLAMA_PORT))
         s.close()
-        return result == 0
+        running = result == 0
     except:
-        return False
+        running = False
+    
+    _ollama_check = (time.monotonic(), running)
+    return running
 
 def generate_qr_code(url, save_path):
     """Generiert einen QR-Code für die URL und zeigt ihn an"""